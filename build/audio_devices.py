@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Enumeração de dispositivos de áudio
+DirectShow via ffplay (parser independente da saída de "-list_devices true
+-f dshow", com benchmark sobre saídas gravadas em assets/fixtures/) e
+PortAudio via sounddevice, para o modificador de voz em Python.
+"""
+
+import argparse
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+FIXTURES_DIR = Path(__file__).parent.parent / "assets" / "fixtures"
+
+_QUOTED = re.compile(r'\]\s+"([^"]+)"\s*(?:\((\w+)\))?')
+
+
+def parse_dshow_devices(output, kind="audio"):
+    """
+    Extrai os nomes de dispositivos de um tipo (audio/video) da saída do ffplay.
+    Aceita os dois formatos: o antigo, com seções "DirectShow audio devices",
+    e o do FFmpeg 5+, com o tipo entre parênteses ao fim de cada linha.
+    Linhas "Alternative name" são ignoradas e a ordem é preservada.
+    """
+    devices = []
+    section = None
+    for line in output.splitlines():
+        if "DirectShow video devices" in line:
+            section = "video"
+            continue
+        if "DirectShow audio devices" in line:
+            section = "audio"
+            continue
+        if "Alternative name" in line:
+            continue
+        match = _QUOTED.search(line)
+        if not match:
+            continue
+        name, tag = match.groups()
+        if (tag or section) == kind and name not in devices:
+            devices.append(name)
+    return devices
+
+
+def list_audio_devices(ffplay, timeout=10):
+    """Executa o ffplay e devolve a lista de microfones DirectShow"""
+    result = subprocess.run([ffplay, "-hide_banner", "-list_devices", "true", "-f", "dshow", "-i", "dummy"],
+                            capture_output=True, text=True, timeout=timeout, errors="replace",
+                            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
+    return parse_dshow_devices(result.stderr)
+
+
+# APIs do PortAudio por preferência: o MME (padrão no Windows) corta os nomes em 31 caracteres
+_HOSTAPI_PREFERENCE = ("Windows WASAPI", "Windows DirectSound")
+_MME_NAME_LIMIT = 31
+
+
+def _portaudio(refresh=False):
+    import sounddevice
+    if refresh:
+        # O PortAudio só enxerga dispositivos conectados depois de reinicializado.
+        # Não chamar com um stream aberto: _terminate() o encerraria.
+        sounddevice._terminate()
+        sounddevice._initialize()
+    return sounddevice
+
+
+def _hostapi(sd):
+    names = [api["name"] for api in sd.query_hostapis()]
+    for name in _HOSTAPI_PREFERENCE:
+        if name in names:
+            return names.index(name)
+    return sd.default.hostapi
+
+
+def list_sounddevice_inputs(refresh=False):
+    """Microfones do PortAudio numa única API (WASAPI, DirectSound ou a padrão), na ordem do sistema"""
+    sd = _portaudio(refresh)
+    hostapi = _hostapi(sd)
+    devices = []
+    for device in sd.query_devices():
+        if device["hostapi"] == hostapi and device["max_input_channels"] > 0 and device["name"] not in devices:
+            devices.append(device["name"])
+    return devices
+
+
+def sounddevice_stream_devices(name):
+    """
+    Índices (entrada, saída) do PortAudio para o microfone name, os dois na
+    mesma API (o PortAudio não abre um stream misturando APIs). Aceita nomes
+    do DirectShow cortados pelo MME; entrada None = microfone padrão.
+    """
+    sd = _portaudio()
+    hostapi = _hostapi(sd)
+    api = sd.query_hostapis(hostapi)
+    found = None
+    for index, device in enumerate(sd.query_devices()):
+        if device["hostapi"] != hostapi or device["max_input_channels"] <= 0 or not name:
+            continue
+        dev_name = device["name"]
+        if dev_name == name or (len(dev_name) == _MME_NAME_LIMIT and name.startswith(dev_name)):
+            found = index
+            break
+    output = api["default_output_device"]
+    return found, output if output >= 0 else None
+
+
+def diff_devices(old, new):
+    """Devolve (adicionados, removidos) entre duas listas de dispositivos"""
+    return [d for d in new if d not in old], [d for d in old if d not in new]
+
+
+def benchmark(repeat=2000):
+    """Tempo médio de parse de cada fixture gravada"""
+    results = []
+    for path in sorted(FIXTURES_DIR.glob("list_devices_*.txt")):
+        text = path.read_text(encoding="utf-8")
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            devices = parse_dshow_devices(text)
+        elapsed = time.perf_counter() - t0
+        results.append({"fixture": path.name, "devices": devices, "us": elapsed / repeat * 1e6})
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lista microfones DirectShow via ffplay")
+    parser.add_argument("--ffplay", default="ffplay")
+    parser.add_argument("--portaudio", action="store_true", help="Lista pelo sounddevice em vez do ffplay")
+    parser.add_argument("--bench", action="store_true", help="Mede o parser sobre as fixtures gravadas")
+    opts = parser.parse_args(argv)
+
+    if opts.bench:
+        for r in benchmark():
+            print(f"{r['fixture']:<28} {len(r['devices'])} dispositivo(s) {r['us']:8.1f}us")
+        return 0
+
+    t0 = time.perf_counter()
+    devices = list_sounddevice_inputs() if opts.portaudio else list_audio_devices(opts.ffplay)
+    for device in devices:
+        print(device)
+    print(f"{len(devices)} dispositivo(s) em {time.perf_counter() - t0:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
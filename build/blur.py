@@ -4,6 +4,7 @@ Script para gerar executável do BlurCam & Voice Controller
 Inclui todos os arquivos necessários
 """
 
+import argparse
 import subprocess
 import sys
 import os
@@ -76,8 +77,12 @@ def check_required_files():
     print("\n✅ Todos os arquivos obrigatórios encontrados!")
     return True
 
-def build_executable():
-    """Gera o executável usando PyInstaller"""
+def build_executable(onedir=False):
+    """
+    Gera o executável usando PyInstaller. Com onedir=True gera uma pasta
+    (exe + _internal/) em vez de um arquivo único: abre mais rápido porque
+    não extrai tudo para uma pasta temporária a cada execução.
+    """
     
     print("\n🚀 Iniciando processo de build...")
     print("=" * 60)
@@ -85,7 +90,7 @@ def build_executable():
     # Comando PyInstaller
     cmd = [
         "pyinstaller",
-        "--onefile",                      # Arquivo único
+        "--onedir" if onedir else "--onefile",  # Pasta ou arquivo único
         "--windowed",                     # Sem console
         "--noconsole",                    # Força sem console
         "--name=BlurCamVoiceController",  # Nome do executável
@@ -115,6 +120,12 @@ def build_executable():
         cmd.extend(["--add-data", f"{file};."])
         print(f"✓ {file} será incluído no executável")
     
+    # Ícones (com os PNGs já redimensionados, a interface abre sem PIL)
+    icons_dir = Path("..") / "assets" / "icons"
+    if icons_dir.exists():
+        cmd.extend(["--add-data", f"{icons_dir};assets/icons"])
+        print("✓ Ícones serão incluídos no executável")
+    
     # Adiciona o arquivo Python principal
     cmd.append("blur_voice.py")
     
@@ -132,7 +143,10 @@ def build_executable():
             print("=" * 60)
             
             # Localiza o executável
-            exe_path = Path("dist/BlurCamVoiceController.exe")
+            if onedir:
+                exe_path = Path("dist/BlurCamVoiceController/BlurCamVoiceController.exe")
+            else:
+                exe_path = Path("dist/BlurCamVoiceController.exe")
             if exe_path.exists():
                 size_mb = exe_path.stat().st_size / 1024 / 1024
                 print(f"\n📁 Executável criado:")
@@ -140,9 +154,12 @@ def build_executable():
                 print(f"   Tamanho: {size_mb:.1f} MB")
                 
                 print("\n📋 INSTRUÇÕES DE USO:")
-                print("   1. O executável está em: dist\\BlurCamVoiceController.exe")
+                print(f"   1. O executável está em: {exe_path}")
                 print("   2. Todos os arquivos necessários já estão incluídos")
-                print("   3. Copie o executável para onde quiser")
+                if onedir:
+                    print("   3. Copie a pasta inteira para onde quiser")
+                else:
+                    print("   3. Copie o executável para onde quiser")
                 print("   4. Execute e aproveite!")
                 
                 print("\n💡 RECURSOS INCLUÍDOS:")
@@ -256,6 +273,11 @@ Aproveite! 🎉
 
 def main():
     """Função principal"""
+    parser = argparse.ArgumentParser(description="Gera o executável do Camaleão")
+    parser.add_argument("--onedir", action="store_true",
+                        help="Gera uma pasta em vez de um arquivo único (abertura mais rápida)")
+    opts = parser.parse_args()
+    
     print("=" * 60)
     print("🛠️  GERADOR DE EXECUTÁVEL")
     print("    BlurCam & Voice Controller")
@@ -277,7 +299,7 @@ def main():
     input("\n✅ Tudo pronto! Pressione Enter para iniciar o build...")
     
     # Passo 3: Gerar executável
-    success = build_executable()
+    success = build_executable(onedir=opts.onedir)
     
     if success:
         # Passo 4: Limpar arquivos temporários
@@ -290,7 +312,10 @@ def main():
         print("🎉 PROCESSO CONCLUÍDO COM SUCESSO!")
         print("=" * 60)
         print("\n📦 Seu executável está pronto para distribuição!")
-        print("📁 Localize em: dist\\BlurCamVoiceController.exe")
+        if opts.onedir:
+            print("📁 Localize em: dist\\BlurCamVoiceController\\")
+        else:
+            print("📁 Localize em: dist\\BlurCamVoiceController.exe")
         
     else:
         print("\n❌ Build falhou. Verifique os erros acima.")
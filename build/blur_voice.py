@@ -1,19 +1,25 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
-import subprocess
 import threading
 import os
 import sys
 import time
 import re
 import json
+import importlib.util
 from pathlib import Path
-from PIL import Image, ImageTk
+from audio_devices import diff_devices, list_audio_devices, list_sounddevice_inputs
+from quality_controller import MAX_PROC_SCALE, QualityController, TelemetryWindow, machine_key
+from startup import USER_DIR, StartupTrace, cached_icon
+from telemetry import JsonlExporter, ProcessMonitor, Telemetry, format_panel
+
+# Linhas de status periódicas do ffplay (não vão para o log)
+FFPLAY_STATUS = re.compile(r"^\s*(nan|-?\d+\.\d+)\s+(M-A|A-V|M-V):")
 
 class ModernBlurCam:
     def __init__(self):
-        self.video_process = None
-        self.audio_process = None
+        self.startup = StartupTrace()
+        self.startup.mark("imports")
         self.video_pid = None
         self.audio_pid = None
         self.is_video_running = False
@@ -39,17 +45,57 @@ class ModernBlurCam:
             "--capture-scale", "0.4", "--proc-scale", "0.4", "--gamma", "0.8", "--dim", "0.22"
         ]
 
+        # Motor Python (video_engine.py): escolhido em CONFIGURAÇÕES (video_backend) ou
+        # usado quando o BlurCamOptDbg.exe não está disponível (ver resolve_backends)
+        self.video_backend = "exe"
+        self.backends_available = {}
+        self.video_output_size = (1280, 720)
+        self.video_workers = 1
+        self.video_max_workers = 1
+        self.video_pipeline = None
+        # "box" desfoca o quadro inteiro; "face" só os rostos (sempre com o motor Python)
+        self.video_mode = "box"
+        self.video_control = None
+        # Controle adaptativo de escala/workers (só com o motor Python)
+        self.quality_controller = None
+        self.quality_window = None
+        # Cada sessão do motor Python tem seu próprio stop_event, que também a identifica
+        self.video_stop_event = None
+        self.video_thread = None
+
         self.audio_devices = []
         self.selected_audio_device = None
+        self.device_scan_running = False
+        # Quem pediu a lista durante uma varredura recebe o resultado dela
+        self.device_scan_callbacks = []
+        self.device_rescan_interval_ms = 60000
         self.audio_filters_male = 'highpass=f=60,asetrate=48000*0.700899,aresample=48000,atempo=1.122462,lowpass=f=7000,aformat=channel_layouts=mono'
         self.audio_filters_female = 'highpass=f=60,asetrate=48000*1.3,aresample=48000,atempo=0.85,lowpass=f=7000,aformat=channel_layouts=mono'
         self.audio_filters = self.audio_filters_male
 
+        # Motor Python (voice_dsp.py): escolhido em CONFIGURAÇÕES (audio_backend) ou
+        # usado quando o ffplay.exe não está disponível
+        self.audio_backend = "ffplay"
+        self.audio_stream = None
+
         # Caminho para a imagem do ícone
         self.icon_path = str(self.base_path / "assets" / "icons" / "camaleao_icon.jpg")
 
         # Arquivo de configurações
         self.config_file = str(self.base_path / "config" / "camaleao_config.json")
+        self.config = {}
+
+        # Dono dos processos filhos, criado no primeiro uso (ver a propriedade supervisor)
+        self._supervisor = None
+        self.child_names = {"video": "Blur", "audio": "Modificador"}
+        self.child_log_budget = {}
+
+        # Telemetria: tempos por estágio dos motores Python, CPU/RSS de todos os processos
+        self.telemetry = Telemetry()
+        self.process_monitor = None
+        self.telemetry_exporter = JsonlExporter(str(USER_DIR / "logs" / "telemetry.jsonl"))
+        self.telemetry_export_failed = False
+        self.telemetry_interval_ms = 1000
         
         self.colors = {
             'bg': '#f8f9fa',
@@ -64,69 +110,238 @@ class ModernBlurCam:
         }
         
         self.setup_gui()
+        self.startup.mark("gui")
         self.load_config()
+        self.update_device_display()
+        # Só o essencial antes da primeira pintura; o resto roda logo depois
+        self.startup_pending = {"devices", "cleanup"}
+        # after_idle marcaria o primeiro ocioso, que pode vir antes de a janela estar na tela
+        self.root.bind("<Map>", self.on_first_paint)
+
+    def on_first_paint(self, event):
+        # Os filhos também disparam <Map> pela tag da janela principal
+        if event.widget is not self.root:
+            return
+        self.root.unbind("<Map>")
+        # Conclui o desenho pendente antes de marcar
+        self.root.update_idletasks()
+        self.startup.mark("first_paint")
+        self.root.after(0, self.finish_startup)
+
+    def finish_startup(self):
+        """Trabalho não essencial; a varredura de dispositivos e a limpeza de órfãos correm em paralelo"""
         self.check_executables()
-        self.load_audio_devices()
-        self.cleanup_orphaned_processes()
+        if not self.rescan_audio_devices():
+            self.startup_step_done("devices")
+        self.cleanup_orphaned_processes().add_done_callback(
+            lambda _: self.root.after(0, self.startup_step_done, "cleanup"))
+        self.schedule_device_rescan()
+        self.process_monitor = ProcessMonitor()
+        self.schedule_telemetry()
+
+    def startup_step_done(self, step):
+        if step not in self.startup_pending:
+            return
+        self.startup_pending.discard(step)
+        if self.startup_pending:
+            return
+        self.startup.mark("ready")
+        if self.startup.enabled:
+            # Benchmark de abertura (startup.py --bench): grava as marcas e fecha
+            self.startup.save()
+            self.on_closing()
+
+    @property
+    def supervisor(self):
+        """Supervisor dos processos filhos (asyncio só é importado aqui, fora da abertura)"""
+        if self._supervisor is None:
+            from process_supervisor import ProcessSupervisor
+            # Drena a saída, para sem bloquear e reinicia com backoff
+            self._supervisor = ProcessSupervisor(
+                on_output=self.on_child_output, on_state=self.on_child_state,
+                pid_file=str(USER_DIR / "camaleao_children.json"))
+        return self._supervisor
     
     def load_config(self):
         """Carrega as configurações salvas do arquivo JSON"""
         try:
             if os.path.exists(self.config_file):
                 with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    saved_device = config.get('selected_audio_device', None)
+                    self.config = json.load(f)
+                    saved_device = self.config.get('selected_audio_device', None)
                     if saved_device:
                         self.selected_audio_device = saved_device
                         self.log_message("Configuração carregada")
+                    # Última lista conhecida: a interface aparece já preenchida e é
+                    # reconciliada quando a varredura em segundo plano terminar
+                    self.audio_devices = list(self.config.get('audio_devices', []))
+                    self.select_video_mode(self.config.get('video_mode', 'box'), save=False)
         except Exception as e:
             self.log_message(f"Erro ao carregar config: {e}")
     
     def save_config(self):
         """Salva as configurações no arquivo JSON"""
         try:
-            config = {
-                'selected_audio_device': self.selected_audio_device
-            }
+            self.config['selected_audio_device'] = self.selected_audio_device
+            self.config['audio_devices'] = self.audio_devices
             with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
+                json.dump(self.config, f, indent=4, ensure_ascii=False)
             self.log_message("Configuração salva")
         except Exception as e:
             self.log_message(f"Erro ao salvar config: {e}")
     
     def cleanup_orphaned_processes(self):
-        if sys.platform == "win32":
-            try:
-                subprocess.run(["taskkill", "/F", "/IM", "BlurCamOptDbg.exe"], capture_output=True, text=True)
-                subprocess.run(["taskkill", "/F", "/IM", "ffplay.exe"], capture_output=True, text=True)
-            except: pass
+        """Mata, pelo PID registrado, filhos que uma sessão anterior deixou para trás"""
+        return self.supervisor.cleanup_stale()
+
+    def on_child_output(self, name, line):
+        """Saída dos filhos (thread do supervisor): filtra status e limita a 20 linhas/s"""
+        if FFPLAY_STATUS.match(line):
+            return
+        now = int(time.monotonic())
+        second, count = self.child_log_budget.get(name, (now, 0))
+        if second != now:
+            second, count = now, 0
+        self.child_log_budget[name] = (second, count + 1)
+        if count < 20:
+            self.root.after(0, self.log_message, f"[{self.child_names[name]}] {line.strip()}")
+
+    def on_child_state(self, name, state, info):
+        self.root.after(0, self.handle_child_state, name, state, info)
+
+    def handle_child_state(self, name, state, info):
+        """Eventos do supervisor, já no thread da interface"""
+        label = self.child_names.get(name, name)
+        if state == "running":
+            if name == "video":
+                self.video_pid = info
+            else:
+                self.audio_pid = info
+            self.log_message(f"{label} iniciado (PID: {info})")
+        elif state == "hung":
+            self.log_message(f"{label} sem resposta (PID: {info}), reiniciando")
+        elif state == "exited":
+            self.log_message(f"{label} encerrou (código {info})")
+        elif state == "restarting":
+            self.log_message(f"{label}: nova tentativa em {info:.0f}s")
+        elif state == "error":
+            self.log_message(f"Erro: {info}")
+        elif state == "stopped":
+            self.log_message(f"{label} parado")
+        elif state == "ended":
+            self.on_video_ended() if name == "video" else self.on_audio_ended()
     
-    def load_audio_devices(self):
-        try:
-            self.log_message("Carregando dispositivos...")
-            if not os.path.exists(self.audio_executable):
-                self.audio_devices = []
-                return
-            
-            result = subprocess.run([self.audio_executable, "-list_devices", "true", "-f", "dshow", "-i", "dummy"],
-                                  capture_output=True, text=True, timeout=10)
-            
-            audio_devices = []
-            for line in result.stderr.split('\n'):
-                if '(audio)' in line.lower() and '"' in line:
-                    match = re.search(r'"([^"]+)"', line)
-                    if match:
-                        audio_devices.append(match.group(1))
-            
-            self.audio_devices = audio_devices
-            if audio_devices:
-                self.log_message(f"{len(audio_devices)} dispositivo(s) encontrado(s)")
-                self.update_audio_device_list()
-                # Atualiza o display após carregar os dispositivos
-                self.update_device_display()
-        except Exception as e:
-            self.log_message(f"Erro: {e}")
-            self.audio_devices = []
+    def schedule_telemetry(self):
+        """Atualiza o painel de desempenho a cada segundo e exporta enquanto algo roda"""
+        def tick():
+            try:
+                self.update_telemetry()
+            except Exception as e:
+                self.log_message(f"Erro na telemetria: {e}")
+            self.schedule_telemetry()
+        self.root.after(self.telemetry_interval_ms, tick)
+
+    def update_telemetry(self):
+        snapshot = self.telemetry.snapshot()
+        pids = {"Camaleão": os.getpid()}
+        for name, pid in self.supervisor.pids().items():
+            pids[self.child_names[name]] = pid
+        processes = self.process_monitor.sample(pids)
+        self.adapt_video_quality()
+        self.perf_label.config(text=format_panel(snapshot, processes))
+        if self.is_video_running or self.is_audio_running:
+            snapshot["processes"] = processes
+            ok = self.telemetry_exporter.write(snapshot)
+            if not ok and not self.telemetry_export_failed:
+                self.log_message(f"Telemetria não exportada: {self.telemetry_exporter.error}")
+            self.telemetry_export_failed = not ok
+
+    def adapt_video_quality(self):
+        """Uma janela do controle adaptativo: aplica o novo ponto ao vivo e salva para esta máquina"""
+        pipeline, controller = self.video_pipeline, self.quality_controller
+        if pipeline is None or controller is None:
+            return
+        fps, latency_ms, stage_ms = self.quality_window.read()
+        point = controller.update(fps, latency_ms, self.process_monitor.system_cpu(), stage_ms)
+        if point is None:
+            return
+        pipeline.set_params(**point)
+        self.video_workers = point['workers']
+        self.set_video_arg("proc-scale", point['proc_scale'])
+        self.set_video_arg("threads", point['workers'])
+        self.log_message(f"Qualidade ajustada: escala {point['proc_scale']:.2f}, {point['workers']} worker(s)")
+        self.config.setdefault('video_quality', {})[machine_key()] = controller.to_config()
+        self.save_config()
+
+    def rescan_audio_devices(self, on_done=None):
+        """
+        Lista os dispositivos em segundo plano; o resultado volta ao thread da
+        interface. Pelo PortAudio no motor Python (os nomes que o stream abre),
+        senão pelo DirectShow via ffplay.
+        """
+        portaudio = self.audio_backend == "python"
+        if self.device_scan_running:
+            if on_done:
+                self.device_scan_callbacks.append(on_done)
+            return True
+        if not portaudio and not os.path.exists(self.audio_executable):
+            if on_done:
+                self.log_message("FFplay não encontrado: não é possível listar os dispositivos")
+            return False
+        self.device_scan_running = True
+        if on_done:
+            self.device_scan_callbacks.append(on_done)
+        # Reinicializar o PortAudio (para ver dispositivos novos) fecharia o stream aberto
+        refresh = self.audio_stream is None
+
+        def run():
+            try:
+                if portaudio:
+                    devices = list_sounddevice_inputs(refresh=refresh)
+                else:
+                    devices = list_audio_devices(self.audio_executable)
+                self.root.after(0, self.on_audio_devices_scanned, devices, portaudio)
+            except Exception as e:
+                self.root.after(0, self.on_audio_devices_scanned, None, portaudio, e)
+
+        threading.Thread(target=run, daemon=True).start()
+        return True
+
+    def on_audio_devices_scanned(self, devices, portaudio, error=None):
+        """Reconcilia a lista em cache com o resultado da varredura (só age se algo mudou)"""
+        self.device_scan_running = False
+        callbacks, self.device_scan_callbacks = self.device_scan_callbacks, []
+        self.startup_step_done("devices")
+        if portaudio != (self.audio_backend == "python"):
+            # O motor de voz mudou durante a varredura: os nomes são do outro motor
+            self.device_scan_callbacks = callbacks
+            self.rescan_audio_devices()
+            return
+        if error is not None:
+            self.log_message(f"Erro ao listar dispositivos: {error}")
+            return
+
+        if devices != self.audio_devices:
+            added, removed = diff_devices(self.audio_devices, devices)
+            self.audio_devices = devices
+            for device in added:
+                self.log_message(f"Dispositivo conectado: {device}")
+            for device in removed:
+                self.log_message(f"Dispositivo removido: {device}")
+            if self.selected_audio_device and self.selected_audio_device not in devices:
+                self.log_message("Dispositivo configurado não encontrado")
+            self.update_audio_device_list()
+            self.update_device_display()
+            self.save_config()
+        for on_done in callbacks:
+            on_done(devices)
+
+    def schedule_device_rescan(self):
+        """Varredura periódica; sem mudanças, nada é atualizado nem salvo"""
+        def tick():
+            self.rescan_audio_devices()
+            self.schedule_device_rescan()
+        self.root.after(self.device_rescan_interval_ms, tick)
     
     def update_audio_device_list(self):
         if self.audio_devices and not self.selected_audio_device:
@@ -146,10 +361,55 @@ class ModernBlurCam:
         video_found = os.path.exists(self.video_executable) or (script_dir / self.video_executable).exists()
         audio_found = os.path.exists(self.audio_executable) or (script_dir / self.audio_executable).exists()
         
-        if not video_found:
-            self.video_btn.button.config(state="disabled", bg=self.colors['text_light'])
-        if not audio_found:
-            self.audio_btn.button.config(state="disabled", bg=self.colors['text_light'])
+        # find_spec não importa os módulos (a abertura continua leve)
+        found = {name: importlib.util.find_spec(name) is not None
+                 for name in ("numpy", "cv2", "pyvirtualcam", "sounddevice")}
+        # Câmera (OpenCV) e câmera virtual (pyvirtualcam) são as pontas do motor de vídeo
+        video_python = found["numpy"] and found["cv2"] and found["pyvirtualcam"]
+        self.backends_available = {
+            "video": {"exe": video_found, "python": video_python},
+            "audio": {"ffplay": audio_found, "python": found["numpy"] and found["sounddevice"]},
+        }
+        if not video_python:
+            # O modo rosto só existe no motor Python
+            self.face_mode_btn.config(state="disabled", cursor="")
+            if self.video_mode == "face":
+                self.log_message("Modo rosto requer opencv-python e pyvirtualcam")
+                self.select_video_mode("box", save=False)
+        for kind, button in (("video", self.video_btn), ("audio", self.audio_btn)):
+            if not any(self.backends_available[kind].values()):
+                button.button.config(state="disabled", bg=self.colors['text_light'])
+        self.resolve_backends(log=True)
+
+    def resolve_backends(self, log=False):
+        """
+        Escolhe o motor de vídeo e o de voz conforme video_backend/audio_backend
+        no config: "auto" (executável, ou Python se ele faltar), "exe"/"ffplay" ou
+        "python" (troca de parâmetros ao vivo, sem reiniciar). O que está rodando
+        não muda; a escolha vale a partir do próximo início.
+        """
+        sides = (("video", "exe", "BlurCam", self.is_video_running),
+                 ("audio", "ffplay", "FFplay", self.is_audio_running))
+        for kind, external, label, running in sides:
+            available = self.backends_available.get(kind)
+            if running or not available:
+                continue
+            wanted = self.config.get(f"{kind}_backend", "auto")
+            if wanted == "python" and available["python"]:
+                backend = "python"
+            elif available[external]:
+                backend = external
+            elif available["python"]:
+                backend = "python"
+            else:
+                continue
+            if log and backend != wanted:
+                if wanted == "auto":
+                    if backend == "python":
+                        self.log_message(f"{label} não encontrado, usando motor Python")
+                else:
+                    self.log_message(f"Motor '{wanted}' indisponível, usando '{backend}'")
+            setattr(self, f"{kind}_backend", backend)
     
     def create_rounded_button(self, parent, text, bg, command):
         # Frame externo para simular bordas arredondadas
@@ -170,9 +430,9 @@ class ModernBlurCam:
     def setup_gui(self):
         self.root = tk.Tk()
         self.root.title("Camaleão - Proteção de Privacidade")
-        self.root.geometry("750x820")
+        self.root.geometry("750x940")
         self.root.resizable(True, True)
-        self.root.minsize(700, 770)
+        self.root.minsize(700, 890)
         self.root.configure(bg=self.colors['bg'])
         
         # Definir ícone da janela
@@ -180,10 +440,9 @@ class ModernBlurCam:
             # Opção 1: Se você tiver um arquivo .ico
             # self.root.iconbitmap("camaleao_icon.ico")
             
-            # Opção 2: Se você tiver PNG/JPG (mesmo arquivo do header)
-            icon_img = Image.open(self.icon_path)
-            icon_photo = ImageTk.PhotoImage(icon_img)
-            self.root.iconphoto(True, icon_photo)
+            # Opção 2: PNG já redimensionado em cache (o Tk lê direto, sem PIL)
+            self.window_icon = tk.PhotoImage(file=cached_icon(self.icon_path, 64))
+            self.root.iconphoto(True, self.window_icon)
         except:
             pass  # Se não conseguir carregar, usa o ícone padrão
         
@@ -202,9 +461,7 @@ class ModernBlurCam:
         
         # Tentar carregar o ícone
         try:
-            icon_image = Image.open(self.icon_path)
-            icon_image = icon_image.resize((40, 40), Image.Resampling.LANCZOS)
-            self.icon_photo = ImageTk.PhotoImage(icon_image)
+            self.icon_photo = tk.PhotoImage(file=cached_icon(self.icon_path, 40))
             icon_label = tk.Label(title_frame, image=self.icon_photo, bg=self.colors['bg'])
             icon_label.pack(side=tk.LEFT, padx=(0, 10))
         except:
@@ -231,9 +488,36 @@ class ModernBlurCam:
         
         tk.Label(vc, text="Desfoque de Vídeo", font=("Segoe UI", 15, "bold"),
                 bg=self.colors['card'], fg=self.colors['text']).pack(anchor="w", pady=(0, 5))
-        tk.Label(vc, text="Desfoca completamente a imagem da câmera", font=("Segoe UI", 10),
+        tk.Label(vc, text="Desfoca a imagem inteira da câmera ou só o rosto", font=("Segoe UI", 10),
                 bg=self.colors['card'], fg=self.colors['text_light']).pack(anchor="w", pady=(0, 12))
         
+        # Modo: tela inteira ou só o rosto
+        mode_frame = tk.Frame(vc, bg=self.colors['card'])
+        mode_frame.pack(fill=tk.X, pady=(0, 12))
+        
+        self.full_mode_btn = tk.Button(mode_frame, text="TELA INTEIRA", font=("Segoe UI", 10, "bold"),
+                                       bg=self.colors['primary'], fg='white', relief=tk.FLAT, bd=0,
+                                       cursor="hand2", command=lambda: self.select_video_mode("box"))
+        self.full_mode_btn.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 4), ipady=6)
+        
+        self.face_mode_btn = tk.Button(mode_frame, text="ROSTO", font=("Segoe UI", 10, "bold"),
+                                       bg='#e2e8f0', fg=self.colors['text'], relief=tk.FLAT, bd=0,
+                                       cursor="hand2", command=lambda: self.select_video_mode("face"))
+        self.face_mode_btn.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(4, 0), ipady=6)
+        
+        # Intensidade do desfoque
+        blur_frame = tk.Frame(vc, bg=self.colors['card'])
+        blur_frame.pack(fill=tk.X, pady=(0, 12))
+        
+        tk.Label(blur_frame, text="Intensidade:", font=("Segoe UI", 9),
+                bg=self.colors['card'], fg=self.colors['text_light']).pack(side=tk.LEFT)
+        self.blur_scale = tk.Scale(blur_frame, from_=10, to=150, orient=tk.HORIZONTAL, showvalue=False,
+                                   bg=self.colors['card'], troughcolor=self.colors['border'],
+                                   highlightthickness=0, bd=0, command=self.on_blur_scale)
+        self.blur_scale.set(90)
+        self.blur_scale.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(8, 0))
+        self.blur_scale.bind("<ButtonRelease-1>", self.on_blur_scale_release)
+        
         self.video_btn = self.create_rounded_button(vc, "LIGAR DESFOQUE DE VÍDEO", self.colors['primary'], self.toggle_video)
         self.video_btn.pack(fill=tk.X, ipady=12)
         
@@ -267,7 +551,18 @@ class ModernBlurCam:
         self.device_label.pack(side=tk.LEFT, padx=(8, 0))
         
         # Gender
+        gender_frame = tk.Frame(ac, bg=self.colors['card'])
+        gender_frame.pack(fill=tk.X, pady=(0, 12))
+        
+        self.male_btn = tk.Button(gender_frame, text="MASCULINO", font=("Segoe UI", 10, "bold"),
+                                  bg=self.colors['secondary'], fg='white', relief=tk.FLAT, bd=0,
+                                  cursor="hand2", command=lambda: self.select_gender("masculino"))
+        self.male_btn.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 4), ipady=6)
         
+        self.female_btn = tk.Button(gender_frame, text="FEMININO", font=("Segoe UI", 10, "bold"),
+                                    bg='#e2e8f0', fg=self.colors['text'], relief=tk.FLAT, bd=0,
+                                    cursor="hand2", command=lambda: self.select_gender("feminino"))
+        self.female_btn.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(4, 0), ipady=6)
         
         self.audio_btn = self.create_rounded_button(ac, "LIGAR MODIFICAÇÃO DE VOZ", self.colors['secondary'], self.toggle_audio)
         self.audio_btn.pack(fill=tk.X, ipady=12)
@@ -285,6 +580,24 @@ class ModernBlurCam:
         btn3 = self.create_rounded_button(controls, "CONFIGURAÇÕES", '#718096', self.show_config)
         btn3.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(3, 0), ipady=11)
         
+        # Desempenho
+        perf_card_shadow = tk.Frame(main, bg='#d0d5dd', highlightthickness=0)
+        perf_card_shadow.pack(fill=tk.X, pady=(0, 15))
+        
+        perf_card = tk.Frame(perf_card_shadow, bg=self.colors['card'], highlightbackground=self.colors['border'],
+                            highlightthickness=0)
+        perf_card.pack(fill=tk.X, padx=2, pady=2)
+        
+        pc = tk.Frame(perf_card, bg=self.colors['card'])
+        pc.pack(fill=tk.X, padx=20, pady=12)
+        
+        tk.Label(pc, text="Desempenho", font=("Segoe UI", 12, "bold"),
+                bg=self.colors['card'], fg=self.colors['text']).pack(anchor="w", pady=(0, 6))
+        
+        self.perf_label = tk.Label(pc, text="Sem dados (ligue o desfoque ou a voz)", font=("Consolas", 8),
+                                   bg=self.colors['card'], fg=self.colors['text_light'], justify=tk.LEFT)
+        self.perf_label.pack(anchor="w")
+        
         # Log
         log_card_shadow = tk.Frame(main, bg='#d0d5dd', highlightthickness=0)
         log_card_shadow.pack(fill=tk.BOTH, expand=True)
@@ -326,7 +639,51 @@ class ModernBlurCam:
             self.log_message("Tipo de voz: FEMININO")
         
         if self.is_audio_running:
-            self.log_message("Reinicie para aplicar")
+            if self.audio_stream is not None:
+                # Motor Python: troca ao vivo com crossfade, sem reiniciar
+                self.audio_stream.changer.set_preset(self.audio_filters)
+                self.log_message("Tipo de voz aplicado")
+            else:
+                self.log_message("Reinicie para aplicar (ou use o motor Python em CONFIGURAÇÕES)")
+
+    def on_blur_scale(self, value):
+        self.set_blur_params(blur=int(float(value)))
+
+    def on_blur_scale_release(self, event):
+        if self.is_video_running and self.video_pipeline is None and self.video_control is None:
+            self.log_message("Reinicie o desfoque para aplicar (ou use o motor Python em CONFIGURAÇÕES)")
+
+    def set_blur_params(self, **params):
+        """Atualiza blur/gamma/dim; com o motor Python em execução aplica no próximo quadro"""
+        for name, value in params.items():
+            self.set_video_arg(name, value)
+        if self.video_pipeline is not None:
+            self.video_pipeline.set_params(**params)
+        elif self.video_control is not None:
+            self.video_control.send(**params)
+
+    def select_video_mode(self, mode, save=True):
+        """Tela inteira (box) ou só o rosto (face); vale a partir do próximo início do desfoque"""
+        if mode == "face" and self.backends_available and not self.backends_available["video"]["python"]:
+            self.log_message("Modo rosto requer opencv-python e pyvirtualcam")
+            return
+        selected = {'bg': self.colors['primary'], 'fg': 'white'}
+        idle = {'bg': '#e2e8f0', 'fg': self.colors['text']}
+        self.full_mode_btn.config(**(selected if mode == "box" else idle))
+        self.face_mode_btn.config(**(selected if mode == "face" else idle))
+        if mode == self.video_mode:
+            return
+        self.video_mode = mode
+        self.log_message(f"Modo de vídeo: {'ROSTO' if mode == 'face' else 'TELA INTEIRA'}")
+        if save:
+            self.config['video_mode'] = mode
+            self.save_config()
+        if self.is_video_running:
+            self.log_message("Reinicie o desfoque para aplicar")
+
+    def set_video_arg(self, name, value):
+        i = self.video_args.index(f"--{name}")
+        self.video_args[i + 1] = str(value)
     
     def log_message(self, message):
         timestamp = time.strftime("%H:%M:%S")
@@ -344,61 +701,157 @@ class ModernBlurCam:
         self.root.geometry(f'{w}x{h}+{x}+{y}')
     
     def toggle_video(self):
+        if not self.is_video_running:
+            self.choose_video_quality()
         self.start_video() if not self.is_video_running else self.stop_video()
+
+    def choose_video_quality(self):
+        """Ponto de operação inicial: o salvo para esta máquina ou um worker por núcleo livre"""
+        self.video_max_workers = max(1, min(8, (os.cpu_count() or 1) - 1))
+        saved = self.config.get('video_quality', {}).get(machine_key())
+        if saved:
+            self.video_workers = max(1, min(int(saved['workers']), self.video_max_workers))
+            self.set_video_arg("proc-scale", saved['proc_scale'])
+            # O BlurCamOptDbg.exe captura em capture-scale: acompanha um ponto salvo acima de 0.4
+            self.set_video_arg("capture-scale", max(0.4, float(saved['proc_scale'])))
+        else:
+            # Deixa um núcleo para captura/saída
+            self.video_workers = self.video_max_workers
+        self.set_video_arg("threads", self.video_workers)
+        return self.video_workers
     
     def start_video(self):
+        self.resolve_backends()
+        # O BlurCamOptDbg.exe só desfoca o quadro inteiro
+        if self.video_backend == "python" or self.video_mode == "face":
+            self.start_video_engine()
+            return
+
         if not os.path.exists(self.video_executable):
             messagebox.showerror("Erro", "BlurCam não encontrado!")
             return
         
         self.log_message("Iniciando blur...")
-        
+        self.supervisor.spawn("video", [self.video_executable] + self.video_args, restart=True)
+        self.is_video_running = True
+        self.video_btn.button.config(text="DESLIGAR DESFOQUE DE VÍDEO", bg=self.colors['danger'])
+    
+    def start_video_engine(self):
+        """Inicia o desfoque in-process (video_engine.py) em uma thread"""
+        from control_channel import ControlChannel
+        from video_engine import BlurEngine, CameraSource, VirtualCameraSink, run_engine
+        from video_pipeline import FramePipeline
+
+        self.log_message("Iniciando blur (motor Python)...")
+        stop_event = self.video_stop_event = threading.Event()
+        previous = self.video_thread
+
         def run():
             try:
-                self.video_process = subprocess.Popen([self.video_executable] + self.video_args,
-                                                      stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                                      creationflags=subprocess.CREATE_NO_WINDOW if sys.platform=="win32" else 0)
-                self.video_pid = self.video_process.pid
-                self.log_message(f"Blur iniciado (PID: {self.video_pid})")
-                self.video_process.wait()
-                self.root.after(0, self.on_video_ended)
+                if previous is not None:
+                    # A sessão anterior pode ainda estar parando e segurando a câmera
+                    previous.join()
+                if stop_event.is_set():
+                    return
+                args = list(self.video_args)
+                if self.video_mode == "face":
+                    # Fundo nítido: captura na resolução de saída, só os rostos passam pelo desfoque
+                    args += ["--mode", "face", "--capture-scale", "1.0"]
+                else:
+                    # Captura no teto da malha: a proc_scale pode subir além do ponto inicial
+                    args += ["--capture-scale", str(MAX_PROC_SCALE)]
+                engine = BlurEngine.from_args(args)
+                width, height = self.video_output_size
+                cap_w, cap_h = engine.capture_size(width, height)
+                source = CameraSource(width=cap_w, height=cap_h)
+                try:
+                    sink = VirtualCameraSink(width, height, source.fps)
+                except Exception:
+                    source.close()
+                    raise
+                if engine.face is not None:
+                    # Modo rosto: laço único (o pipeline divide o quadro inteiro em faixas)
+                    control = self.video_control = ControlChannel()
+                    self.log_message(f"Blur iniciado (motor Python, modo rosto, "
+                                     f"{type(engine.face.detector).__name__})")
+                    try:
+                        stats = run_engine(engine, source, sink, out_size=(width, height),
+                                           stop_event=stop_event, telemetry=self.telemetry,
+                                           control=control)
+                    finally:
+                        if self.video_control is control:
+                            self.video_control = None
+                    self.log_message(f"Blur: {stats['frames']} quadros, {stats['fps']:.1f} fps, "
+                                     f"{engine.face.failsafe_frames} em tela inteira")
+                else:
+                    pipeline = FramePipeline(engine, source, sink, workers=self.video_workers,
+                                             out_size=(width, height), telemetry=self.telemetry,
+                                             max_workers=self.video_max_workers,
+                                             max_proc_scale=engine.capture_scale)
+                    controller = self.quality_controller = QualityController(
+                        target_fps=source.fps, proc_scale=engine.proc_scale, workers=self.video_workers,
+                        max_workers=self.video_max_workers, max_scale=engine.capture_scale)
+                    self.quality_window = TelemetryWindow(self.telemetry)
+                    self.video_pipeline = pipeline
+                    self.log_message(f"Blur iniciado (motor Python, {self.video_workers} worker(s))")
+                    try:
+                        stats = pipeline.run(stop_event=stop_event)
+                    finally:
+                        # Uma sessão nova pode já ter começado: só limpa o que é desta
+                        if self.video_pipeline is pipeline:
+                            self.video_pipeline = None
+                        if self.quality_controller is controller:
+                            self.quality_controller = None
+                    self.log_message(f"Blur: {stats['frames_out']} quadros, {stats['fps']:.1f} fps, "
+                                     f"{stats['dropped']} descartados")
             except Exception as e:
                 self.log_message(f"Erro: {e}")
-                self.root.after(0, self.on_video_ended)
-        
-        threading.Thread(target=run, daemon=True).start()
+            finally:
+                self.root.after(0, self.on_video_session_ended, stop_event)
+
+        self.video_thread = threading.Thread(target=run, daemon=True)
+        self.video_thread.start()
         self.is_video_running = True
         self.video_btn.button.config(text="DESLIGAR DESFOQUE DE VÍDEO", bg=self.colors['danger'])
-    
+
     def stop_video(self):
         self.log_message("Parando blur...")
-        if self.video_process:
-            try:
-                if self.video_process.poll() is None:
-                    self.video_process.terminate()
-                    try:
-                        self.video_process.wait(timeout=1)
-                    except subprocess.TimeoutExpired:
-                        self.video_process.kill()
-                        self.video_process.wait()
-            except: pass
-        
-        if sys.platform == "win32":
-            subprocess.run(["taskkill", "/F", "/IM", "BlurCamOptDbg.exe"], capture_output=True, text=True)
+        if self.video_stop_event:
+            # Motor Python (thread): para no próximo quadro
+            self.video_stop_event.set()
+            self.video_stop_event = None
+            self.log_message("Blur parado")
+        else:
+            # Não bloqueia: o supervisor termina o processo (e mata pelo PID se preciso)
+            self.supervisor.stop("video")
         
         self.on_video_ended()
-        self.log_message("Blur parado")
     
+    def on_video_session_ended(self, stop_event):
+        """Fim da thread de uma sessão do motor Python; ignora sessões já substituídas"""
+        if self.video_stop_event is stop_event:
+            self.video_stop_event = None
+            self.on_video_ended()
+        elif self.video_stop_event is None and not self.is_video_running:
+            # Parada pelo usuário: a thread só agora deixou de gravar tempos
+            self.telemetry.clear("video.")
+
     def on_video_ended(self):
         self.is_video_running = False
-        self.video_process = None
         self.video_pid = None
+        # Sem isso o painel continuaria mostrando a última sessão
+        self.telemetry.clear("video.")
         self.video_btn.button.config(text="LIGAR DESFOQUE DE VÍDEO", bg=self.colors['primary'])
     
     def toggle_audio(self):
         self.start_audio() if not self.is_audio_running else self.stop_audio()
     
     def start_audio(self):
+        self.resolve_backends()
+        if self.audio_backend == "python":
+            self.start_audio_engine()
+            return
+
         if not os.path.exists(self.audio_executable):
             messagebox.showerror("Erro", "FFplay não encontrado!")
             return
@@ -411,64 +864,68 @@ class ModernBlurCam:
                 return
         
         self.log_message(f"Iniciando modificador...")
-        
-        def run():
-            try:
-                cmd = [
-                    self.audio_executable,
-                    '-nodisp', '-autoexit',
-                    '-f', 'dshow',
-                    '-i', f'audio={self.selected_audio_device}',
-                    '-af', self.audio_filters
-                ]
-                self.audio_process = subprocess.Popen(cmd,
-                                                      creationflags=subprocess.CREATE_NO_WINDOW if sys.platform=="win32" else 0)
-                self.audio_pid = self.audio_process.pid
-                self.log_message(f"Modificador iniciado (PID: {self.audio_pid})")
-                self.log_message(self.audio_process.args)
-                self.audio_process.wait()
-                
-                self.root.after(0, self.on_audio_ended)
-            except Exception as e:
-                self.log_message(f"Erro: {e}")
-                self.root.after(0, self.on_audio_ended)
-        
-        threading.Thread(target=run, daemon=True).start()
+        cmd = [
+            self.audio_executable,
+            '-nodisp', '-autoexit',
+            '-f', 'dshow',
+            '-i', f'audio={self.selected_audio_device}',
+            '-af', self.audio_filters
+        ]
+        # O ffplay imprime status continuamente; silêncio prolongado indica travamento
+        self.supervisor.spawn("audio", cmd, restart=True, hang_timeout=10)
         self.is_audio_running = True
         self.audio_btn.button.config(text="DESLIGAR MODIFICAÇÃO DE VOZ", bg=self.colors['danger'])
     
+    def start_audio_engine(self):
+        """Inicia o modificador de voz in-process (voice_dsp.py) no dispositivo selecionado"""
+        from audio_devices import sounddevice_stream_devices
+        from voice_dsp import LiveVoiceChanger, SoundDeviceStream
+
+        self.log_message("Iniciando modificador (motor Python)...")
+        try:
+            input_device, output_device = sounddevice_stream_devices(self.selected_audio_device)
+            if input_device is None and self.selected_audio_device:
+                self.log_message("Dispositivo configurado não encontrado, usando o microfone padrão")
+            changer = LiveVoiceChanger(self.audio_filters)
+            self.audio_stream = SoundDeviceStream(changer, input_device=input_device, output_device=output_device,
+                                                  block_size=changer.block_size, telemetry=self.telemetry)
+            self.audio_stream.start()
+        except Exception as e:
+            self.audio_stream = None
+            self.log_message(f"Erro: {e}")
+            return
+        self.log_message(f"Modificador iniciado (motor Python, latência {changer.latency_ms():.1f} ms)")
+        self.is_audio_running = True
+        self.audio_btn.button.config(text="DESLIGAR MODIFICAÇÃO DE VOZ", bg=self.colors['danger'])
+
     def stop_audio(self):
         self.log_message("Parando modificador...")
-        if self.audio_process:
+        if self.audio_stream:
             try:
-                if self.audio_process.poll() is None:
-                    self.audio_process.terminate()
-                    try:
-                        self.audio_process.wait(timeout=1)
-                    except subprocess.TimeoutExpired:
-                        self.audio_process.kill()
-                        self.audio_process.wait()
-            except: pass
-        
-        if sys.platform == "win32":
-            subprocess.run(["taskkill", "/F", "/IM", "ffplay.exe"], capture_output=True, text=True)
+                self.audio_stream.close()
+            except Exception as e:
+                self.log_message(f"Erro: {e}")
+            self.audio_stream = None
+        if self.audio_backend == "ffplay":
+            self.supervisor.stop("audio")
+        else:
+            self.log_message("Modificador parado")
         
         self.on_audio_ended()
-        self.log_message("Modificador parado")
     
     def on_audio_ended(self):
         self.is_audio_running = False
-        self.audio_process = None
         self.audio_pid = None
+        self.telemetry.clear("audio.")
         self.audio_btn.button.config(text="LIGAR MODIFICAÇÃO DE VOZ", bg=self.colors['secondary'])
     
     def start_all(self):
         self.log_message("Iniciando tudo...")
         if not self.is_video_running:
+            self.choose_video_quality()
             self.start_video()
         if not self.is_audio_running:
-            time.sleep(0.5)
-            self.start_audio()
+            self.root.after(500, lambda: self.is_audio_running or self.start_audio())
     
     def stop_all(self):
         self.log_message("Parando tudo...")
@@ -480,8 +937,8 @@ class ModernBlurCam:
     def show_config(self):
         cw = tk.Toplevel(self.root)
         cw.title("Configurações")
-        cw.geometry("650x400")
-        cw.minsize(600, 350)
+        cw.geometry("650x520")
+        cw.minsize(600, 470)
         cw.configure(bg=self.colors['bg'])
         cw.transient(self.root)
         cw.grab_set()
@@ -489,8 +946,8 @@ class ModernBlurCam:
         # Centralizar janela
         cw.update_idletasks()
         x = (cw.winfo_screenwidth() // 2) - (650 // 2)
-        y = (cw.winfo_screenheight() // 2) - (400 // 2)
-        cw.geometry(f'650x400+{x}+{y}')
+        y = (cw.winfo_screenheight() // 2) - (520 // 2)
+        cw.geometry(f'650x520+{x}+{y}')
         
         c = tk.Frame(cw, bg=self.colors['bg'])
         c.pack(fill=tk.BOTH, expand=True, padx=35, pady=30)
@@ -517,28 +974,62 @@ class ModernBlurCam:
         
         combo = ttk.Combobox(cc, state="readonly", font=("Segoe UI", 11), values=self.audio_devices)
         combo.pack(fill=tk.X, ipady=12, pady=(0,25))
+
+        def refresh_combo(devices):
+            if combo.winfo_exists():
+                combo.config(values=devices)
         
         if self.selected_audio_device and self.selected_audio_device in self.audio_devices:
             combo.set(self.selected_audio_device)
         elif self.audio_devices:
             combo.current(0)
         
+        # Motores Python: intensidade do desfoque e tipo de voz mudam ao vivo
+        tk.Label(cc, text="Motores", font=("Segoe UI", 14, "bold"),
+                bg=self.colors['card'], fg=self.colors['text']).pack(anchor="w", pady=(0,10))
+        backends = {}
+        options = (("video", "Desfoque pelo motor Python (intensidade ao vivo, requer opencv-python e pyvirtualcam)"),
+                   ("audio", "Voz pelo motor Python (troca de voz ao vivo, requer sounddevice)"))
+        for kind, text in options:
+            var = tk.BooleanVar(value=self.config.get(f"{kind}_backend") == "python")
+            check = tk.Checkbutton(cc, text=text, variable=var, font=("Segoe UI", 10),
+                                   bg=self.colors['card'], fg=self.colors['text'],
+                                   activebackground=self.colors['card'], anchor="w")
+            if not self.backends_available.get(kind, {}).get("python"):
+                check.config(state="disabled")
+            check.pack(fill=tk.X, pady=(0, 4))
+            backends[kind] = var
+        tk.Frame(cc, bg=self.colors['card'], height=16).pack()
+        
         btn_frame = tk.Frame(cc, bg=self.colors['card'])
         btn_frame.pack(fill=tk.X)
         
         apply_btn = self.create_rounded_button(btn_frame, "APLICAR", self.colors['success'],
-                                               lambda: self.apply_config(cw, combo))
+                                               lambda: self.apply_config(cw, combo, backends))
         apply_btn.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 8), ipady=14)
         
+        rescan_btn = self.create_rounded_button(btn_frame, "ATUALIZAR", self.colors['primary'],
+                                                lambda: self.rescan_audio_devices(refresh_combo))
+        rescan_btn.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(8, 8), ipady=14)
+        
         cancel_btn = self.create_rounded_button(btn_frame, "CANCELAR", self.colors['text_light'],
                                                lambda: cw.destroy())
         cancel_btn.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(8, 0), ipady=14)
     
-    def apply_config(self, window, combo):
+    def apply_config(self, window, combo, backends):
         try:
             sel = combo.get()
             if sel:
                 self.selected_audio_device = sel
+                for kind, var in backends.items():
+                    self.config[f"{kind}_backend"] = "python" if var.get() else "auto"
+                audio_backend = self.audio_backend
+                self.resolve_backends(log=True)
+                if self.audio_backend != audio_backend:
+                    # DirectShow e PortAudio nomeiam os microfones de formas diferentes
+                    self.rescan_audio_devices()
+                if self.is_video_running or self.is_audio_running:
+                    self.log_message("Motores: a escolha vale a partir do próximo início")
                 self.save_config()
                 self.log_message(f"Dispositivo configurado")
                 self.update_device_display()
@@ -552,13 +1043,26 @@ class ModernBlurCam:
     def on_closing(self):
         self.log_message("Encerrando...")
         self.stop_all()
-        time.sleep(0.5)
-        self.cleanup_orphaned_processes()
+        self.root.withdraw()
+        self.finish_closing(time.monotonic() + 2.0)
+
+    def finish_closing(self, deadline):
+        """Espera (sem bloquear o mainloop) os filhos e o motor de vídeo pararem, por no máximo 2 s"""
+        children = self._supervisor is not None and self._supervisor.pids()
+        engine = self.video_thread is not None and self.video_thread.is_alive()
+        if (children or engine) and time.monotonic() < deadline:
+            self.root.after(50, self.finish_closing, deadline)
+            return
+        if self._supervisor is not None:
+            self._supervisor.close()
         self.root.destroy()
     
     def run(self):
         self.root.mainloop()
 
 if __name__ == "__main__":
+    import multiprocessing
+
+    multiprocessing.freeze_support()
     app = ModernBlurCam()
     app.run()
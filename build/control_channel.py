@@ -0,0 +1,35 @@
+"""
+Canal de controle para parâmetros ao vivo
+Quem controla (interface) chama send(); o laço de processamento chama poll()
+uma vez por bloco/quadro e aplica o que chegou, sem bloquear.
+"""
+
+import threading
+import time
+
+
+class ControlChannel:
+    """Caixa de mensagens thread-safe: o valor mais recente de cada parâmetro vence"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.sent_at = None
+        # Momento do send() correspondente ao último poll() com conteúdo
+        self.last_sent_at = None
+
+    def send(self, **params):
+        """Publica novos valores; não bloqueia o processamento"""
+        with self.lock:
+            self.pending.update(params)
+            if self.sent_at is None:
+                self.sent_at = time.perf_counter()
+
+    def poll(self):
+        """Retira os parâmetros pendentes, ou None se não houver"""
+        if not self.pending:
+            return None
+        with self.lock:
+            params, self.pending = self.pending, {}
+            self.last_sent_at, self.sent_at = self.sent_at, None
+        return params
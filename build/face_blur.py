@@ -0,0 +1,516 @@
+#!/usr/bin/env python3
+"""
+Modo rosto do motor de desfoque
+Um detector só de CPU roda a cada N quadros em resolução reduzida; entre
+detecções as regiões são seguidas por correlação cruzada normalizada e só
+as caixas dos rostos (com margem) são desfocadas. Se a confiança do
+rastreamento cair ou nenhum rosto for encontrado, o quadro inteiro é
+desfocado (fail-safe). O detector roda numa thread à parte: o laço de
+quadros só rastreia, e o resultado de cada detecção é trazido até o quadro
+atual pelo mesmo rastreamento. Inclui clipes sintéticos com as caixas verdadeiras
+para medir custo por quadro e cobertura contra o modo de tela inteira.
+"""
+
+import argparse
+import collections
+import os
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from video_engine import BlurEngine, FrameSource, VideoFileSource, box_blur_rows
+
+# Pesos de luminância (BT.601) para o quadro de rastreamento
+_GRAY = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+class SkinDetector:
+    """
+    Detector por cor de pele: pixels dentro da faixa YCrCb típica são
+    agrupados em blocos e os componentes conexos com formato de rosto
+    viram caixas. Só numpy; menos preciso que o Haar (mãos e fundos bege
+    também passam), mas barato e sem dependências.
+    """
+
+    width = 160
+
+    def __init__(self, block=4, min_blocks=6, min_fill=0.45):
+        self.block = block
+        self.min_blocks = min_blocks
+        self.min_fill = min_fill
+
+    def detect(self, rgb):
+        """Devolve [(x0, y0, x1, y1, confiança)] nas coordenadas de rgb"""
+        r, g, b = (rgb[..., i].astype(np.int32) for i in range(3))
+        cr = 128 + ((128 * r - 107 * g - 21 * b) >> 8)
+        cb = 128 + ((-43 * r - 85 * g + 128 * b) >> 8)
+        mask = (cr >= 133) & (cr <= 173) & (cb >= 77) & (cb <= 127)
+        k = self.block
+        bh, bw = mask.shape[0] // k, mask.shape[1] // k
+        grid = mask[:bh * k, :bw * k].reshape(bh, k, bw, k).mean(axis=(1, 3)) > 0.5
+
+        boxes = []
+        seen = np.zeros_like(grid)
+        for y, x in np.argwhere(grid):
+            if seen[y, x]:
+                continue
+            # Componente conexo (vizinhança 4) por busca em largura na grade de blocos
+            seen[y, x] = True
+            queue = collections.deque([(y, x)])
+            ys, xs = [], []
+            while queue:
+                cy, cx = queue.popleft()
+                ys.append(cy)
+                xs.append(cx)
+                for ny, nx in ((cy - 1, cx), (cy + 1, cx), (cy, cx - 1), (cy, cx + 1)):
+                    if 0 <= ny < bh and 0 <= nx < bw and grid[ny, nx] and not seen[ny, nx]:
+                        seen[ny, nx] = True
+                        queue.append((ny, nx))
+            if len(ys) < self.min_blocks:
+                continue
+            y0, y1, x0, x1 = min(ys), max(ys) + 1, min(xs), max(xs) + 1
+            fill = len(ys) / ((y1 - y0) * (x1 - x0))
+            aspect = (y1 - y0) / (x1 - x0)
+            if fill >= self.min_fill and 0.7 <= aspect <= 2.5:
+                boxes.append((x0 * k, y0 * k, x1 * k, y1 * k, fill))
+        return boxes
+
+
+class HaarDetector:
+    """Cascata Haar de rosto frontal do OpenCV (dependência opcional)"""
+
+    width = 320
+
+    def __init__(self, min_size=40, neighbors=4):
+        try:
+            import cv2
+        except ImportError:
+            raise RuntimeError("OpenCV não instalado (pip install opencv-python)")
+        self._cv2 = cv2
+        path = os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml")
+        self.cascade = cv2.CascadeClassifier(path)
+        if self.cascade.empty():
+            raise RuntimeError(f"Cascata Haar não encontrada: {path}")
+        self.min_size = min_size
+        self.neighbors = neighbors
+
+    def detect(self, rgb):
+        gray = self._cv2.equalizeHist(self._cv2.cvtColor(rgb, self._cv2.COLOR_RGB2GRAY))
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=1.2, minNeighbors=self.neighbors,
+                                              minSize=(self.min_size, self.min_size))
+        return [(int(x), int(y), int(x + w), int(y + h), 1.0) for x, y, w, h in faces]
+
+
+def make_detector(name="auto"):
+    """haar, skin ou auto (Haar se o OpenCV estiver instalado, senão cor de pele)"""
+    if name == "skin":
+        return SkinDetector()
+    if name == "haar":
+        return HaarDetector()
+    if name == "auto":
+        try:
+            return HaarDetector()
+        except RuntimeError:
+            return SkinDetector()
+    raise ValueError(f"Detector desconhecido: {name}")
+
+
+def track_box(prev_gray, gray, box):
+    """
+    Procura o miolo de box (coordenadas de prev_gray) em gray, numa janela
+    de busca proporcional ao tamanho da caixa, por correlação cruzada
+    normalizada. Devolve (caixa deslocada, confiança em [-1, 1]).
+    """
+    x0, y0, x1, y1 = box
+    mx, my = (x1 - x0) // 5, (y1 - y0) // 5
+    tx0, ty0, tx1, ty1 = x0 + mx, y0 + my, x1 - mx, y1 - my
+    tpl = prev_gray[max(ty0, 0):ty1, max(tx0, 0):tx1]
+    if tpl.shape[0] < 4 or tpl.shape[1] < 4:
+        return box, 0.0
+    tx0, ty0 = max(tx0, 0), max(ty0, 0)
+    h, w = gray.shape
+    radius = max(4, (x1 - x0) // 4)
+    sx0, sy0 = max(0, tx0 - radius), max(0, ty0 - radius)
+    region = gray[sy0:min(h, ty0 + tpl.shape[0] + radius), sx0:min(w, tx0 + tpl.shape[1] + radius)]
+    if region.shape[0] < tpl.shape[0] or region.shape[1] < tpl.shape[1]:
+        return box, 0.0
+
+    t = tpl - tpl.mean()
+    t_norm = float(np.sqrt((t * t).sum()))
+    if t_norm < 1e-3:
+        # Modelo sem textura: não dá para confiar em nenhuma posição
+        return box, 0.0
+    windows = sliding_window_view(region, tpl.shape)
+    n = tpl.size
+    # Como t tem média zero, sum(W * t) já é a covariância sem centralizar W
+    num = np.einsum("yxij,ij->yx", windows, t)
+    sums = windows.sum(axis=(2, 3))
+    var = np.einsum("yxij,yxij->yx", windows, windows) - sums * sums / n
+    ncc = num / (np.sqrt(np.maximum(var, 1e-6)) * t_norm)
+    by, bx = np.unravel_index(int(np.argmax(ncc)), ncc.shape)
+    dx, dy = sx0 + bx - tx0, sy0 + by - ty0
+    return (x0 + dx, y0 + dy, x1 + dx, y1 + dy), float(ncc[by, bx])
+
+
+class FaceBlur:
+    """
+    Desfoque só das regiões de rosto, usado pelo BlurEngine em mode="face".
+
+    A cada quadro o rastreamento desloca as caixas (em um quadro cinza de
+    track_width pixels de largura); a cada detect_every quadros uma detecção
+    é disparada numa thread à parte (background=False: no próprio quadro) e,
+    quando termina, as caixas encontradas são rastreadas do quadro em que
+    ela foi disparada até o atual e substituem as anteriores. Fail-safe (quadro inteiro desfocado, detecção a cada
+    quadro até recuperar): confiança do rastreamento abaixo de
+    min_confidence, ou nenhum rosto detectado por mais de max_misses
+    detecções seguidas. O modo começa em fail-safe até a primeira detecção.
+    """
+
+    def __init__(self, engine, detect_every=5, detector="auto", pad=0.3, min_confidence=0.6,
+                 max_misses=1, track_width=160, grid=16, background=True):
+        self.engine = engine
+        self.detect_every = max(1, int(detect_every))
+        self.detector = make_detector(detector) if isinstance(detector, str) else detector
+        self.pad = pad
+        self.min_confidence = min_confidence
+        self.max_misses = max_misses
+        self.track_width = track_width
+        self.grid = grid
+        self.background = background
+        self._executor = None
+        self.reset()
+
+    def reset(self):
+        # Uma detecção em andamento é descartada (o resultado chega e é ignorado)
+        self.pending = None
+        self.since_detect = 0
+        self.tracks = []
+        self.confidence = 0.0
+        self.prev_gray = None
+        self.misses = 0
+        self.failsafe = True
+        self.regions = []
+        self.frames = 0
+        self.failsafe_frames = 0
+        self.detections = 0
+        self.detect_time = 0.0
+
+    def _detect(self, small, track_size):
+        """Roda o detector no quadro já reduzido; devolve caixas nas coordenadas de rastreamento"""
+        t0 = time.perf_counter()
+        found = self.detector.detect(small)
+        self.detect_time += time.perf_counter() - t0
+        self.detections += 1
+        s = track_size[0] / small.shape[1]
+        return [(int(x0 * s), int(y0 * s), int(np.ceil(x1 * s)), int(np.ceil(y1 * s)), score)
+                for x0, y0, x1, y1, score in found]
+
+    def _start_detection(self, frame, gray, track_size):
+        """Reduz o quadro para o detector e dispara a detecção (na thread, se background)"""
+        h, w = frame.shape[:2]
+        dw = min(w, self.detector.width)
+        dh = max(1, int(round(h * dw / w)))
+        small = self.engine.resize(frame, dw, dh)
+        # O quadro de origem pode ser reaproveitado pela captura enquanto o detector roda
+        small = small.copy() if small is frame else np.ascontiguousarray(small)
+        self.since_detect = 0
+        if not self.background:
+            return self._apply_detection(self._detect(small, track_size), None, gray)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="face-detect")
+        self.pending = (self._executor.submit(self._detect, small, track_size), gray)
+
+    def _apply_detection(self, found, det_gray, gray):
+        """Troca as caixas pelas detectadas, trazidas de det_gray até o quadro atual"""
+        if found and det_gray is not None and det_gray is not gray:
+            moved = [(track_box(det_gray, gray, box[:4]), box[4]) for box in found]
+            found = [box + (min(score, conf),) for (box, conf), score in moved]
+            found = [box for box in found if box[4] >= self.min_confidence]
+        if found:
+            self.tracks = [box[:4] for box in found]
+            self.confidence = min(box[4] for box in found)
+            self.misses = 0
+            self.failsafe = False
+        else:
+            self.misses += 1
+            # Um rosto rastreado com confiança sobrevive a falhas isoladas do detector
+            if not self.tracks or self.misses > self.max_misses:
+                self.tracks = []
+                self.failsafe = True
+
+    def close(self):
+        """Encerra a thread do detector (ela é recriada se o FaceBlur voltar a ser usado)"""
+        self.pending = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def update(self, frame):
+        """Atualiza caixas e fail-safe para o quadro; devolve as caixas (coordenadas de rastreamento)"""
+        engine = self.engine
+        h, w = frame.shape[:2]
+        tw = min(w, self.track_width)
+        th = max(1, int(round(h * tw / w)))
+        gray = engine.resize(frame, tw, th).astype(np.float32) @ _GRAY
+
+        if self.tracks and self.prev_gray is not None:
+            moved = [track_box(self.prev_gray, gray, box) for box in self.tracks]
+            self.tracks = [box for box, _ in moved]
+            self.confidence = min(conf for _, conf in moved)
+            if self.confidence < self.min_confidence:
+                self.tracks = []
+                self.failsafe = True
+
+        if self.pending is not None and self.pending[0].done():
+            future, det_gray = self.pending
+            self.pending = None
+            self._apply_detection(future.result(), det_gray, gray)
+
+        if self.pending is None and (self.failsafe or not self.tracks
+                                     or self.since_detect >= self.detect_every):
+            self._start_detection(frame, gray, (tw, th))
+        self.since_detect += 1
+
+        self.prev_gray = gray
+        return self.tracks
+
+    def regions_for(self, boxes, track_size, out_size):
+        """Caixas com margem, na resolução de saída, alinhadas à grade (limita tamanhos distintos)"""
+        sx = out_size[0] / track_size[0]
+        sy = out_size[1] / track_size[1]
+        g = self.grid
+        regions = []
+        for x0, y0, x1, y1 in boxes:
+            px, py = (x1 - x0) * self.pad, (y1 - y0) * self.pad
+            rx0 = max(0, int((x0 - px) * sx) // g * g)
+            ry0 = max(0, int((y0 - 1.5 * py) * sy) // g * g)
+            rx1 = min(out_size[0], -(-int(np.ceil((x1 + px) * sx)) // g) * g)
+            ry1 = min(out_size[1], -(-int(np.ceil((y1 + py) * sy)) // g) * g)
+            if rx1 > rx0 and ry1 > ry0:
+                regions.append((rx0, ry0, rx1, ry1))
+        return regions
+
+    def blur_region(self, out, region):
+        """Desfoca (box + gamma/dim) uma região do quadro de saída no lugar"""
+        engine = self.engine
+        x0, y0, x1, y1 = region
+        w, h = x1 - x0, y1 - y0
+        small = engine.resize(out[y0:y1, x0:x1], max(1, int(round(w * engine.proc_scale))),
+                              max(1, int(round(h * engine.proc_scale))))
+        blurred = engine.apply_lut(box_blur_rows(small, engine.radius))
+        out[y0:y1, x0:x1] = engine.resize(blurred, w, h)
+
+    def process(self, frame, out_size):
+        width, height = out_size
+        boxes = self.update(frame)
+        self.frames += 1
+        if self.failsafe:
+            self.failsafe_frames += 1
+            self.regions = [(0, 0, width, height)]
+            return self.engine.blur_full(frame, out_size)
+        out = self.engine.resize(frame, width, height)
+        if out is frame:
+            out = frame.copy()
+        h, w = frame.shape[:2]
+        tw = min(w, self.track_width)
+        track_size = (tw, max(1, int(round(h * tw / w))))
+        self.regions = self.regions_for(boxes, track_size, out_size)
+        for region in self.regions:
+            self.blur_region(out, region)
+        return out
+
+
+# --- clipes de teste ---
+
+def _face_sprite(fw, fh, seed=0):
+    """Rosto desenhado (pele, olhos, sobrancelhas, boca) e a máscara elíptica"""
+    yy, xx = np.mgrid[0:fh, 0:fw].astype(np.float32)
+    nx, ny = (xx - fw / 2) / (fw / 2), (yy - fh / 2) / (fh / 2)
+    mask = nx * nx + ny * ny <= 1.0
+    shade = 1.0 - 0.18 * (nx * nx + ny * ny)
+    rng = np.random.default_rng(seed)
+    base = np.array([224, 172, 140], dtype=np.float32) * (0.92 + 0.08 * rng.random())
+    sprite = base * shade[..., None] + rng.normal(0, 4, (fh, fw, 1))
+    dark = np.array([60, 40, 35], dtype=np.float32)
+    for cx in (-0.38, 0.38):
+        eye = ((nx - cx) / 0.16) ** 2 + ((ny + 0.18) / 0.08) ** 2 <= 1.0
+        brow = (np.abs(nx - cx) < 0.2) & (np.abs(ny + 0.36) < 0.03)
+        sprite[eye | brow] = dark
+    mouth = (np.abs(nx) < 0.3) & (np.abs(ny - 0.45) < 0.05)
+    sprite[mouth] = np.array([150, 70, 70], dtype=np.float32)
+    sprite[(np.abs(nx) < 0.06) & (ny > -0.1) & (ny < 0.25)] *= 0.85
+    return np.clip(sprite, 0, 255).astype(np.uint8), mask
+
+
+def _triangle(t, period):
+    """Onda triangular em [0, 1]"""
+    phase = (t / period) % 1.0
+    return 2 * phase if phase < 0.5 else 2 - 2 * phase
+
+
+# Trajetórias (centro do rosto como fração da largura/altura, ou None = fora de cena) por clipe
+CLIPS = {
+    "parado": [lambda t: (0.5 + 0.01 * np.sin(2 * np.pi * t / 3), 0.48)],
+    "movimento": [lambda t: (0.5 + 0.27 * np.sin(2 * np.pi * t / 4), 0.48 + 0.05 * np.sin(2 * np.pi * t / 3))],
+    "rapido": [lambda t: (0.15 + 0.7 * _triangle(t, 1.2), 0.5)],
+    "dois_rostos": [lambda t: (0.25, 0.5),
+                    lambda t: (0.7 + 0.12 * np.sin(2 * np.pi * t / 2.5), 0.45)],
+    "saida": [lambda t: None if 2.0 <= t < 3.5 else (0.5 + 0.3 * np.sin(2 * np.pi * t / 6), 0.48)],
+}
+
+
+class SyntheticFaceSource(FrameSource):
+    """
+    Clipe sintético reproduzível: fundo texturizado (fora da faixa de pele)
+    com rostos desenhados seguindo as trajetórias de CLIPS[clip]. boxes
+    guarda as caixas verdadeiras (visíveis) do último quadro lido.
+    """
+
+    def __init__(self, clip="movimento", width=1280, height=720, frames=150, fps=30.0, seed=0):
+        self.clip = clip
+        self.paths = CLIPS[clip]
+        self.width = width
+        self.height = height
+        self.frames = frames
+        self.fps = fps
+        self.count = 0
+        self.boxes = []
+        yy, xx = np.mgrid[0:height, 0:width]
+        rng = np.random.default_rng(seed)
+        base = np.empty((height, width, 3), dtype=np.float32)
+        base[..., 0] = 70 + 30 * np.sin(xx / 37.0)
+        base[..., 1] = 90 + 25 * np.sin(yy / 23.0 + xx / 91.0)
+        base[..., 2] = 140 + 40 * np.cos(xx / 53.0 - yy / 41.0)
+        base += rng.normal(0, 6, (height, width, 1))
+        self.background = np.clip(base, 0, 255).astype(np.uint8)
+        fh = height * 3 // 8
+        self.sprite, self.mask = _face_sprite(fh * 3 // 4, fh, seed)
+        self.frame = np.empty_like(self.background)
+
+    def read(self):
+        if self.frames is not None and self.count >= self.frames:
+            return None
+        t = self.count / self.fps
+        np.copyto(self.frame, self.background)
+        fh, fw = self.mask.shape
+        self.boxes = []
+        for path in self.paths:
+            center = path(t)
+            if center is None:
+                continue
+            x0 = int(center[0] * self.width - fw / 2)
+            y0 = int(center[1] * self.height - fh / 2)
+            cx0, cy0 = max(0, x0), max(0, y0)
+            cx1, cy1 = min(self.width, x0 + fw), min(self.height, y0 + fh)
+            if cx1 <= cx0 or cy1 <= cy0:
+                continue
+            sprite = self.sprite[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0]
+            mask = self.mask[cy0 - y0:cy1 - y0, cx0 - x0:cx1 - x0]
+            np.copyto(self.frame[cy0:cy1, cx0:cx1], sprite, where=mask[..., None])
+            self.boxes.append((cx0, cy0, cx1, cy1))
+        self.count += 1
+        return self.frame
+
+
+def coverage(boxes, regions, out_size, frame_size):
+    """Fração da área verdadeira dos rostos (coords do quadro) coberta pelas regiões desfocadas"""
+    if not boxes:
+        return 1.0
+    sx = out_size[0] / frame_size[0]
+    sy = out_size[1] / frame_size[1]
+    total = covered = 0
+    for x0, y0, x1, y1 in boxes:
+        x0, y0, x1, y1 = int(x0 * sx), int(y0 * sy), int(np.ceil(x1 * sx)), int(np.ceil(y1 * sy))
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=bool)
+        for rx0, ry0, rx1, ry1 in regions:
+            mask[max(ry0 - y0, 0):max(ry1 - y0, 0), max(rx0 - x0, 0):max(rx1 - x0, 0)] = True
+        total += mask.size
+        covered += int(mask.sum())
+    return covered / total if total else 1.0
+
+
+def measure_clip(source, engine_args=(), detector="auto", detect_every=5):
+    """
+    Custo por quadro do modo tela inteira (argumentos atuais, capture_scale
+    0.4) contra o modo rosto (capture_scale 1.0, para o fundo ficar nítido)
+    no mesmo clipe. Com caixas verdadeiras (clipes sintéticos) também mede
+    cobertura e quadros com vazamento (rosto visível sem fail-safe).
+    """
+    full = BlurEngine.from_args(list(engine_args))
+    face = BlurEngine.from_args(list(engine_args) + ["--mode", "face", "--capture-scale", "1.0",
+                                                     "--detector", detector,
+                                                     "--detect-every", str(detect_every)])
+    full_ms, face_ms, covers = [], [], []
+    leaks = 0
+    try:
+        while True:
+            frame = source.read()
+            if frame is None:
+                break
+            out_size = (source.width, source.height)
+            # A câmera do modo tela inteira já entrega em capture_scale: a redução fica fora da medida
+            captured = np.ascontiguousarray(full.resize(frame, *full.capture_size(*out_size)))
+            t0 = time.perf_counter()
+            full.process(captured, out_size)
+            t1 = time.perf_counter()
+            face.process(frame, out_size)
+            t2 = time.perf_counter()
+            full_ms.append((t1 - t0) * 1000.0)
+            face_ms.append((t2 - t1) * 1000.0)
+            boxes = getattr(source, "boxes", None)
+            if boxes is not None:
+                c = coverage(boxes, face.face.regions, out_size, frame.shape[1::-1])
+                covers.append(c)
+                leaks += c < 0.95
+    finally:
+        source.close()
+        face.close()
+    stats = face.face
+    return {
+        "frames": len(face_ms),
+        "full_ms": float(np.mean(full_ms)),
+        "face_ms": float(np.mean(face_ms)),
+        "face_p95_ms": float(np.percentile(face_ms, 95)),
+        "failsafe": stats.failsafe_frames / max(1, stats.frames),
+        "detect_ms": stats.detect_time * 1000.0 / max(1, stats.detections),
+        "detector": type(stats.detector).__name__,
+        "coverage": float(np.mean(covers)) if covers else None,
+        "leaks": leaks if covers else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Modo rosto: custo por quadro contra tela inteira")
+    parser.add_argument("--bench", action="store_true", help="Mede os clipes sintéticos (ou --clip)")
+    parser.add_argument("--clip", nargs="+", help="Clipes gravados (qualquer vídeo lido pelo OpenCV)")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--bench-detector", default="auto", choices=["auto", "haar", "skin"])
+    parser.add_argument("--bench-every", type=int, default=5)
+    opts, engine_args = parser.parse_known_args(argv)
+    if not opts.bench:
+        parser.print_help()
+        return 0
+
+    if opts.clip:
+        sources = [(os.path.basename(p), VideoFileSource(p, frames=opts.frames)) for p in opts.clip]
+    else:
+        sources = [(name, SyntheticFaceSource(name, opts.width, opts.height, opts.frames)) for name in CLIPS]
+    print(f"{'clipe':<12} {'tela inteira':>12} {'rosto':>8} {'p95':>8} {'detecção':>9} "
+          f"{'fail-safe':>9} {'cobertura':>9} {'vazamentos':>10}")
+    for name, source in sources:
+        r = measure_clip(source, engine_args, opts.bench_detector, opts.bench_every)
+        cover = f"{r['coverage'] * 100:8.1f}%" if r["coverage"] is not None else f"{'-':>9}"
+        leaks = f"{r['leaks']:>10}" if r["leaks"] is not None else f"{'-':>10}"
+        print(f"{name:<12} {r['full_ms']:10.2f}ms {r['face_ms']:6.2f}ms {r['face_p95_ms']:6.2f}ms "
+              f"{r['detect_ms']:7.2f}ms {r['failsafe'] * 100:8.1f}% {cover} {leaks}")
+    print(f"Detector: {r['detector']}, a cada {opts.bench_every} quadros")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Supervisor dos processos filhos (BlurCamOptDbg.exe e ffplay.exe)
+Um único loop asyncio em segundo plano é dono de todos os filhos: drena
+stdout/stderr continuamente, para sem bloquear quem chamou, mata por PID
+(nunca pelo nome da imagem), detecta travamentos pela falta de saída e
+reinicia com backoff exponencial.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+_LINE_SPLIT = re.compile(r"[\r\n]+")
+
+
+class _Child:
+    def __init__(self, name, cmd, restart, hang_timeout, backoff, backoff_max):
+        self.name = name
+        self.cmd = cmd
+        self.restart = restart
+        self.hang_timeout = hang_timeout
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.proc = None
+        self.task = None
+        self.stopping = False
+        self.wake = asyncio.Event()
+        self.last_output = 0.0
+        self.restarts = 0
+
+
+class ProcessSupervisor:
+    """
+    Gerencia processos filhos em um loop asyncio próprio. Todos os métodos
+    públicos retornam na hora; eventos chegam pelos callbacks, chamados no
+    thread do supervisor:
+
+        on_output(name, line)        cada linha de stdout/stderr
+        on_state(name, state, info)  starting, running, hung, exited,
+                                     restarting, error e, por último,
+                                     stopped (pedido) ou ended (saiu sozinho)
+    """
+
+    def __init__(self, on_output=None, on_state=None, pid_file=None):
+        self.on_output = on_output or (lambda name, line: None)
+        self.on_state = on_state or (lambda name, state, info: None)
+        self.pid_file = pid_file
+        self.children = {}
+        self.pid_file_error = None
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="supervisor", daemon=True)
+        self.thread.start()
+
+    # --- API (qualquer thread) ---
+
+    def spawn(self, name, cmd, restart=False, hang_timeout=None, backoff=1.0, backoff_max=30.0):
+        """Inicia um filho; com restart=True ele volta sozinho se sair ou travar"""
+        self.loop.call_soon_threadsafe(self._spawn, name, list(cmd), restart, hang_timeout,
+                                       backoff, backoff_max)
+
+    def stop(self, name, timeout=1.0):
+        """Pede a parada de um filho; devolve um Future concluído quando ele sair"""
+        return asyncio.run_coroutine_threadsafe(self._stop(name, timeout), self.loop)
+
+    def stop_all(self, timeout=1.0):
+        return asyncio.run_coroutine_threadsafe(self._stop_all(timeout), self.loop)
+
+    def is_running(self, name):
+        return name in self.children
+
+    def pids(self):
+        return {name: c.proc.pid for name, c in list(self.children.items())
+                if c.proc is not None and c.proc.returncode is None}
+
+    def cleanup_stale(self):
+        """Mata (por PID) filhos registrados no pid_file por uma sessão anterior"""
+        return asyncio.run_coroutine_threadsafe(self._cleanup_stale(), self.loop)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=2)
+
+    # --- dentro do loop ---
+
+    def _spawn(self, name, cmd, restart, hang_timeout, backoff, backoff_max):
+        previous = self.children.get(name)
+        if previous is not None:
+            if not previous.stopping:
+                self.on_state(name, "error", "já em execução")
+                return
+            # Religado logo após um stop(): inicia assim que o anterior terminar
+            previous.task.add_done_callback(
+                lambda _: self._spawn(name, cmd, restart, hang_timeout, backoff, backoff_max))
+            return
+        child = _Child(name, cmd, restart, hang_timeout, backoff, backoff_max)
+        self.children[name] = child
+        child.task = self.loop.create_task(self._supervise(child))
+
+    async def _supervise(self, child):
+        delay = child.backoff
+        try:
+            while not child.stopping:
+                self.on_state(child.name, "starting", None)
+                started = time.monotonic()
+                try:
+                    child.proc = await asyncio.create_subprocess_exec(
+                        *child.cmd, stdin=subprocess.DEVNULL,
+                        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                        creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0)
+                except Exception as e:
+                    self.on_state(child.name, "error", str(e))
+                    child.proc = None
+                    if not child.restart:
+                        break
+                else:
+                    child.last_output = time.monotonic()
+                    self._write_pid_file()
+                    self.on_state(child.name, "running", child.proc.pid)
+                    watchdog = self.loop.create_task(self._watchdog(child))
+                    await asyncio.gather(self._drain(child, child.proc.stdout),
+                                         self._drain(child, child.proc.stderr))
+                    code = await child.proc.wait()
+                    watchdog.cancel()
+                    self._write_pid_file(exclude=child.name)
+                    if child.stopping:
+                        break
+                    self.on_state(child.name, "exited", code)
+                    if not child.restart:
+                        break
+
+                # Backoff exponencial, zerado depois de uma execução estável
+                if time.monotonic() - started > 4 * child.backoff_max:
+                    delay = child.backoff
+                child.restarts += 1
+                self.on_state(child.name, "restarting", delay)
+                try:
+                    await asyncio.wait_for(child.wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                delay = min(child.backoff_max, delay * 2)
+        finally:
+            self.children.pop(child.name, None)
+            self._write_pid_file()
+            self.on_state(child.name, "stopped" if child.stopping else "ended", None)
+
+    async def _drain(self, child, stream):
+        """Lê continuamente um pipe (evita que um filho verboso trave com o pipe cheio)"""
+        pending = ""
+        while True:
+            chunk = await stream.read(4096)
+            if not chunk:
+                break
+            child.last_output = time.monotonic()
+            parts = _LINE_SPLIT.split(pending + chunk.decode("utf-8", errors="replace"))
+            pending = parts.pop()
+            for line in parts:
+                if line.strip():
+                    self.on_output(child.name, line)
+        if pending.strip():
+            self.on_output(child.name, pending)
+
+    async def _watchdog(self, child):
+        """Sem saída por hang_timeout segundos = travado: mata para o laço reiniciar"""
+        if not child.hang_timeout:
+            return
+        while child.proc.returncode is None:
+            await asyncio.sleep(min(1.0, child.hang_timeout / 4))
+            if time.monotonic() - child.last_output > child.hang_timeout:
+                self.on_state(child.name, "hung", child.proc.pid)
+                await self._kill_tree(child.proc.pid)
+                return
+
+    async def _stop(self, name, timeout):
+        child = self.children.get(name)
+        if child is None:
+            return
+        child.stopping = True
+        child.wake.set()
+        proc = child.proc
+        if proc is not None and proc.returncode is None:
+            try:
+                proc.terminate()
+                await asyncio.wait_for(proc.wait(), timeout)
+            except ProcessLookupError:
+                pass
+            except asyncio.TimeoutError:
+                await self._kill_tree(proc.pid)
+        # Só conclui quando o laço do filho termina (processo colhido, pipes drenados)
+        await asyncio.wait({child.task}, timeout=timeout)
+
+    async def _stop_all(self, timeout):
+        await asyncio.gather(*(self._stop(name, timeout) for name in list(self.children)))
+
+    async def _kill_tree(self, pid, image=None):
+        """Mata um processo e seus descendentes pelo PID"""
+        if sys.platform == "win32":
+            cmd = ["taskkill", "/F", "/T", "/PID", str(pid)]
+            if image:
+                # Garante que o PID não foi reaproveitado por outro programa
+                cmd += ["/FI", f"IMAGENAME eq {image}"]
+            proc = await asyncio.create_subprocess_exec(*cmd, stdout=subprocess.DEVNULL,
+                                                        stderr=subprocess.DEVNULL,
+                                                        creationflags=subprocess.CREATE_NO_WINDOW)
+            await proc.wait()
+            return
+        if image:
+            try:
+                with open(f"/proc/{pid}/cmdline", "rb") as f:
+                    if image.encode() not in f.read():
+                        return
+            except OSError:
+                return
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    async def _cleanup_stale(self):
+        if not self.pid_file or not os.path.exists(self.pid_file):
+            return
+        try:
+            with open(self.pid_file, "r", encoding="utf-8") as f:
+                stale = json.load(f)
+        except (OSError, ValueError):
+            stale = {}
+        for entry in stale.values():
+            await self._kill_tree(entry["pid"], image=entry["image"])
+        self._write_pid_file()
+
+    def _write_pid_file(self, exclude=None):
+        if not self.pid_file:
+            return
+        entries = {name: {"pid": c.proc.pid, "image": os.path.basename(c.cmd[0])}
+                   for name, c in self.children.items()
+                   if name != exclude and c.proc is not None and c.proc.returncode is None}
+        try:
+            os.makedirs(os.path.dirname(self.pid_file) or ".", exist_ok=True)
+            with open(self.pid_file, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            self.pid_file_error = None
+        except OSError as e:
+            # Sem o arquivo a próxima sessão não acha os órfãos: avisa (uma vez por falha)
+            if self.pid_file_error is None:
+                self.on_state("supervisor", "error", f"Não foi possível gravar {self.pid_file}: {e}")
+            self.pid_file_error = e
+
+
+# --- benchmark: travamento do thread da interface durante start/stop ---
+
+_CHATTY = "import sys\nwhile True: sys.stdout.write('x' * 1000 + '\\n')"
+_STUBBORN = ("import signal, time\nsignal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+             "while True: print('tick', flush=True); time.sleep(0.05)")
+
+
+def _ui_probe(duration, actions):
+    """Simula o mainloop: ticks de 1 ms executando actions[i] em t_i; devolve o maior intervalo"""
+    start = last = time.perf_counter()
+    worst = 0.0
+    pending = sorted(actions, key=lambda a: a[0])
+    while time.perf_counter() - start < duration:
+        now = time.perf_counter()
+        while pending and now - start >= pending[0][0]:
+            pending.pop(0)[1]()
+        now = time.perf_counter()
+        worst = max(worst, now - last)
+        last = now
+        time.sleep(0.001)
+    return worst * 1000.0
+
+
+def measure_ui_stall(duration=3.0):
+    """
+    Compara o maior travamento do thread de interface ao iniciar/parar filhos
+    substitutos (um verboso e um que ignora SIGTERM): Popen/terminate/wait(1)
+    direto no thread, como antes, contra o ProcessSupervisor.
+    """
+    cmds = [[sys.executable, "-c", _CHATTY], [sys.executable, "-c", _STUBBORN]]
+    results = {}
+
+    procs = []
+
+    def legacy_start():
+        for cmd in cmds:
+            procs.append(subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE))
+
+    def legacy_stop():
+        for p in procs:
+            p.terminate()
+            try:
+                p.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                p.kill()
+                p.wait()
+
+    results["legacy_ms"] = _ui_probe(duration, [(0.2, legacy_start), (duration / 2, legacy_stop)])
+
+    supervisor = ProcessSupervisor()
+    stops = []
+    results["supervisor_ms"] = _ui_probe(duration, [
+        (0.2, lambda: [supervisor.spawn(f"child{i}", cmd) for i, cmd in enumerate(cmds)]),
+        (duration / 2, lambda: stops.append(supervisor.stop_all(timeout=1.0))),
+    ])
+    for f in stops:
+        f.result(timeout=5)
+    supervisor.close()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Supervisor de processos do Camaleão")
+    parser.add_argument("--bench", action="store_true",
+                        help="Mede o travamento do thread de interface durante start/stop")
+    opts = parser.parse_args(argv)
+    if opts.bench:
+        r = measure_ui_stall()
+        print(f"Popen/wait no thread da interface: {r['legacy_ms']:8.1f}ms de travamento máximo")
+        print(f"ProcessSupervisor:                {r['supervisor_ms']:8.1f}ms de travamento máximo")
+        return 0
+    parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Controle adaptativo de qualidade do desfoque
+Malha fechada sobre fps, latência e uso de CPU: quando a máquina não dá
+conta, aumenta os workers ou reduz a resolução de processamento
+(proc_scale); quando sobra folga, devolve a qualidade. O ponto de operação
+alcançado fica salvo por máquina no camaleao_config.json. Inclui um modelo
+de carga simulado para testar o controlador sem câmera.
+"""
+
+import argparse
+import os
+import platform
+import random
+import sys
+import threading
+import time
+
+# Degraus de resolução de processamento (fração do tamanho de saída)
+PROC_SCALES = (0.2, 0.25, 0.3, 0.35, 0.4, 0.5, 0.6)
+# Teto da malha: o motor Python captura nesta escala (e não na capture_scale
+# padrão, igual à proc_scale inicial), senão o controle partiria do teto e
+# só poderia baixar a qualidade
+MAX_PROC_SCALE = PROC_SCALES[-1]
+
+
+def machine_key():
+    """Chave da máquina no camaleao_config.json (nome + núcleos)"""
+    return f"{platform.node() or 'local'}/{os.cpu_count() or 1}"
+
+
+class QualityController:
+    """
+    Decide o ponto de operação {"proc_scale", "workers"} a partir de uma
+    medição por janela (update()). Histerese:
+
+    - limiares separados: sobrecarga abaixo de 92% do fps alvo ou acima do
+      orçamento de latência/CPU; folga só com fps cheio, latência abaixo
+      da metade do orçamento e CPU abaixo de cpu_low;
+    - janelas consecutivas: down_after para baixar, up_after para subir;
+    - settle janelas ignoradas no início e após cada mudança;
+    - uma subida desfeita logo em seguida dobra (até 16x) as janelas
+      exigidas para tentar o mesmo ponto de novo;
+    - com o tempo do estágio de desfoque (stage_ms), só sobe se o custo
+      previsto no próximo ponto couber em 80% do intervalo entre quadros;
+      se a próxima resolução não couber com os workers atuais, tenta com
+      um worker a mais.
+    """
+
+    def __init__(self, target_fps=30.0, latency_budget_ms=120.0, proc_scale=0.4, workers=1,
+                 max_workers=1, max_scale=None, scales=PROC_SCALES, cpu_high=85.0, cpu_low=60.0,
+                 down_after=2, up_after=5, settle=2):
+        self.target_fps = float(target_fps)
+        self.latency_budget_ms = float(latency_budget_ms)
+        self.scales = [s for s in sorted(scales) if max_scale is None or s <= max_scale + 1e-9]
+        if not self.scales:
+            self.scales = [min(scales)]
+        self.index = min(range(len(self.scales)), key=lambda i: abs(self.scales[i] - proc_scale))
+        self.max_workers = max(1, int(max_workers))
+        self.workers = max(1, min(int(workers), self.max_workers))
+        self.cpu_high = cpu_high
+        self.cpu_low = cpu_low
+        self.down_after = down_after
+        self.up_after = up_after
+        self.settle_windows = settle
+        self.settle = settle
+        self.over = 0
+        self.under = 0
+        self.failures = {}
+        self.last_up = None
+        self.since_change = 0
+        self.changes = 0
+
+    @classmethod
+    def from_config(cls, saved, **kwargs):
+        """Começa do ponto salvo (dicionário de to_config()), se houver"""
+        if saved:
+            kwargs["proc_scale"] = saved.get("proc_scale", kwargs.get("proc_scale", 0.4))
+            kwargs["workers"] = saved.get("workers", kwargs.get("workers", 1))
+        return cls(**kwargs)
+
+    @property
+    def point(self):
+        return {"proc_scale": self.scales[self.index], "workers": self.workers}
+
+    def to_config(self):
+        return dict(self.point)
+
+    def classify(self, fps, latency_ms, cpu=None):
+        """'over', 'under' (folga) ou 'ok' para uma janela"""
+        if (fps < 0.92 * self.target_fps or latency_ms > self.latency_budget_ms
+                or (cpu is not None and cpu > self.cpu_high)):
+            return "over"
+        if (fps >= 0.97 * self.target_fps and latency_ms < 0.5 * self.latency_budget_ms
+                and (cpu is None or cpu < self.cpu_low)):
+            return "under"
+        return "ok"
+
+    def predict_stage_ms(self, stage_ms, index, workers):
+        """Custo estimado do desfoque em outro ponto (área da imagem / workers)"""
+        area = (self.scales[index] / self.scales[self.index]) ** 2
+        return stage_ms * area * self.workers / workers
+
+    def update(self, fps, latency_ms, cpu=None, stage_ms=None):
+        """Processa uma janela de medição; devolve o novo ponto se mudou, senão None"""
+        self.since_change += 1
+        if self.settle > 0:
+            self.settle -= 1
+            return None
+        state = self.classify(fps, latency_ms, cpu)
+        if state == "over":
+            self.over += 1
+            self.under = 0
+        elif state == "under":
+            self.under += 1
+            self.over = 0
+        else:
+            self.over = self.under = 0
+
+        if self.over >= self.down_after:
+            return self._step_down(cpu)
+        candidate = self._next_up(stage_ms)
+        if candidate is None or self.under < self._up_required(candidate):
+            return None
+        if not self._fits(stage_ms, candidate):
+            self.under = 0
+            return None
+        return self._apply(*candidate, up=True)
+
+    def _fits(self, stage_ms, candidate):
+        """O custo previsto do desfoque no ponto cabe em 80% do intervalo entre quadros?"""
+        return stage_ms is None or self.predict_stage_ms(stage_ms, *candidate) <= 0.8 * 1000.0 / self.target_fps
+
+    def _next_up(self, stage_ms=None):
+        """
+        Próximo ponto acima: mais resolução (com um worker a mais se, com os
+        atuais, o custo previsto não couber); no topo, um worker a menos (libera CPU)
+        """
+        if self.index < len(self.scales) - 1:
+            candidate = self.index + 1, self.workers
+            if not self._fits(stage_ms, candidate) and self.workers < self.max_workers:
+                return self.index + 1, self.workers + 1
+            return candidate
+        if self.workers > 1:
+            return self.index, self.workers - 1
+        return None
+
+    def _up_required(self, candidate):
+        return self.up_after * 2 ** min(self.failures.get(candidate, 0), 4)
+
+    def _step_down(self, cpu):
+        # Subida que não se sustentou: fica mais cara de tentar de novo
+        if self.last_up is not None and self.since_change <= 2 * self.up_after:
+            self.failures[self.last_up] = self.failures.get(self.last_up, 0) + 1
+        if self.workers < self.max_workers and (cpu is None or cpu < self.cpu_high):
+            # Há núcleos livres: paraleliza antes de perder resolução
+            return self._apply(self.index, self.workers + 1)
+        if self.index > 0:
+            return self._apply(self.index - 1, self.workers)
+        if self.workers < self.max_workers:
+            return self._apply(self.index, self.workers + 1)
+        self.over = 0
+        return None
+
+    def _apply(self, index, workers, up=False):
+        self.index = index
+        self.workers = workers
+        self.last_up = (index, workers) if up else None
+        self.over = self.under = 0
+        self.settle = self.settle_windows
+        self.since_change = 0
+        self.changes += 1
+        return self.point
+
+
+class TelemetryWindow:
+    """Medições do vídeo desde a leitura anterior, a partir da Telemetry do pipeline"""
+
+    def __init__(self, telemetry):
+        self.telemetry = telemetry
+        self.frames = telemetry.counters.get("video.frames", 0)
+        self.samples = {}
+        for name in ("video.latency", "video.blur"):
+            series = telemetry.series.get(name)
+            self.samples[name] = series.count if series is not None else 0
+        self.started = time.perf_counter()
+
+    def _p95_ms(self, name):
+        """p95 (ms) só das amostras novas da série"""
+        series = self.telemetry.series.get(name)
+        if series is None or series.count <= self.samples[name]:
+            return None
+        p95 = series.summary((95,), last=series.count - self.samples[name])["p95"]
+        self.samples[name] = series.count
+        return p95 * 1000.0
+
+    def read(self):
+        """Devolve (fps, latência p95, desfoque p95) da janela, em ms, e começa a próxima"""
+        now = time.perf_counter()
+        frames = self.telemetry.counters.get("video.frames", 0)
+        fps = (frames - self.frames) / (now - self.started) if now > self.started else 0.0
+        latency_ms = self._p95_ms("video.latency") or 0.0
+        stage_ms = self._p95_ms("video.blur")
+        self.frames = frames
+        self.started = now
+        return fps, latency_ms, stage_ms
+
+
+class SimulatedMachine:
+    """
+    Modelo de carga do pipeline. O desfoque custa blur_ms em proc_scale 0.4
+    com um worker e escala com a área; workers dividem esse custo com
+    eficiência < 1, somando um custo fixo por faixa. Captura/saída custam
+    io_ms por quadro. background é a fração da CPU ocupada por outros
+    programas (ex.: o app de videochamada) e tira núcleos do desfoque.
+    """
+
+    def __init__(self, cores=4, blur_ms=12.0, io_ms=6.0, stripe_ms=0.8, efficiency=0.85,
+                 background=0.0, noise=0.04, seed=0):
+        self.cores = cores
+        self.blur_ms = blur_ms
+        self.io_ms = io_ms
+        self.stripe_ms = stripe_ms
+        self.efficiency = efficiency
+        self.background = background
+        self.noise = noise
+        self.random = random.Random(seed)
+
+    def measure(self, point, target_fps=30.0):
+        """Uma janela simulada: devolve (fps, latência p95, desfoque em ms, CPU total em %)"""
+        scale, workers = point["proc_scale"], point["workers"]
+        free_cores = max(0.5, self.cores * (1.0 - self.background))
+        parallel = min(workers, free_cores)
+        speedup = 1.0 + (parallel - 1.0) * self.efficiency
+        work_ms = self.blur_ms * (scale / 0.4) ** 2
+        blur = work_ms / speedup + (self.stripe_ms * workers if workers > 1 else 0.0)
+        # Sem núcleo livre para captura/saída, os estágios disputam o mesmo núcleo
+        stage = max(blur, self.io_ms) if workers < free_cores else blur + self.io_ms
+        stage *= 1.0 + self.random.gauss(0.0, self.noise)
+        fps = min(target_fps, 1000.0 / stage)
+        # Saturado, as filas enchem e cada quadro espera os anteriores
+        latency = blur + self.io_ms + (2 * stage if 1000.0 / stage < target_fps else 0.0)
+        busy = fps * (work_ms + self.io_ms) / 1000.0
+        cpu = min(100.0, 100.0 * (busy / self.cores + self.background))
+        return fps, latency, blur, cpu
+
+
+PROFILES = {
+    "fraca": dict(cores=2, blur_ms=40.0, io_ms=8.0),
+    "media": dict(cores=4, blur_ms=18.0),
+    "forte": dict(cores=8, blur_ms=7.0, io_ms=4.0),
+}
+
+
+def simulate(controller, machine, windows=60, events=None):
+    """
+    Roda o controlador contra o modelo por `windows` janelas. events:
+    {janela: fração de CPU de fundo} muda a carga externa no meio.
+    Devolve uma linha por janela.
+    """
+    trace = []
+    for window in range(windows):
+        if events and window in events:
+            machine.background = events[window]
+        point = controller.point
+        fps, latency, stage, cpu = machine.measure(point, controller.target_fps)
+        changed = controller.update(fps, latency, cpu, stage)
+        trace.append({"window": window, "proc_scale": point["proc_scale"], "workers": point["workers"],
+                      "fps": fps, "latency_ms": latency, "cpu": cpu, "changed": changed is not None})
+    return trace
+
+
+def summarize(trace, controller):
+    """Janela da última mudança, número de mudanças e fps/latência das últimas 10 janelas"""
+    last_change = max((r["window"] for r in trace if r["changed"]), default=-1) + 1
+    tail = trace[-10:]
+    return {
+        "settled_at": last_change,
+        "changes": sum(r["changed"] for r in trace),
+        "fps": sum(r["fps"] for r in tail) / len(tail),
+        "latency_ms": sum(r["latency_ms"] for r in tail) / len(tail),
+        "point": controller.point,
+    }
+
+
+def run_simulations(windows=90, verbose=False):
+    """Cada perfil duas vezes: do ponto padrão e do ponto salvo pela primeira execução"""
+    results = []
+    for name, profile in PROFILES.items():
+        max_workers = max(1, min(8, profile["cores"] - 1))
+        saved = None
+        for run in ("padrão", "salvo"):
+            controller = QualityController.from_config(saved, max_workers=max_workers, proc_scale=0.4,
+                                                       workers=1, max_scale=MAX_PROC_SCALE)
+            machine = SimulatedMachine(**profile)
+            # Na metade, outro programa passa a ocupar 50% da CPU
+            trace = simulate(controller, machine, windows, events={windows // 2: 0.5})
+            first_half = summarize(trace[:windows // 2], controller)
+            results.append({"profile": name, "start": run, "summary": summarize(trace, controller),
+                            "first_half": first_half, "trace": trace})
+            if verbose:
+                for r in trace:
+                    print(f"  {name:<6} {r['window']:>3} escala {r['proc_scale']:.2f} "
+                          f"w{r['workers']} {r['fps']:5.1f} fps {r['latency_ms']:6.1f} ms "
+                          f"CPU {r['cpu']:5.1f}%{'  *' if r['changed'] else ''}")
+            saved = {"proc_scale": trace[windows // 2 - 1]["proc_scale"],
+                     "workers": trace[windows // 2 - 1]["workers"]}
+    return results
+
+
+def run_live(seconds=20.0, width=1280, height=720, fps=30.0, workers=1, engine_args=None):
+    """Controlador de verdade sobre o FramePipeline com uma origem sintética em tempo real"""
+    from telemetry import ProcessMonitor
+    from video_engine import BlurEngine, NullSink, SyntheticSource
+    from video_pipeline import FramePipeline
+
+    engine = BlurEngine.from_args(list(engine_args or []) + ["--capture-scale", str(MAX_PROC_SCALE)])
+    max_workers = max(1, min(8, (os.cpu_count() or 1) - 1))
+    controller = QualityController(target_fps=fps, proc_scale=engine.proc_scale, workers=workers,
+                                   max_workers=max_workers, max_scale=engine.capture_scale)
+    cap_w, cap_h = engine.capture_size(width, height)
+    source = SyntheticSource(cap_w, cap_h, frames=int(seconds * fps), fps=fps, realtime=True)
+    pipeline = FramePipeline(engine, source, NullSink(), workers=controller.workers,
+                             max_workers=max_workers, max_proc_scale=engine.capture_scale,
+                             out_size=(width, height))
+    monitor = ProcessMonitor()
+    monitor.system_cpu()
+    done = threading.Event()
+    rows = []
+
+    def tick():
+        window = TelemetryWindow(pipeline.telemetry)
+        while not done.wait(1.0):
+            measured_fps, latency_ms, stage_ms = window.read()
+            cpu = monitor.system_cpu()
+            point = controller.update(measured_fps, latency_ms, cpu, stage_ms)
+            if point:
+                pipeline.set_params(**point)
+            rows.append((measured_fps, latency_ms, cpu, dict(controller.point)))
+
+    thread = threading.Thread(target=tick, daemon=True)
+    thread.start()
+    try:
+        stats = pipeline.run()
+    finally:
+        done.set()
+        thread.join()
+    return stats, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Controle adaptativo de qualidade do desfoque")
+    parser.add_argument("--simulate", action="store_true", help="Testa o controlador no modelo de carga")
+    parser.add_argument("--windows", type=int, default=90)
+    parser.add_argument("--verbose", action="store_true")
+    parser.add_argument("--live", type=float, metavar="SEGUNDOS",
+                        help="Roda o controlador sobre o pipeline real com origem sintética")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    opts, engine_args = parser.parse_known_args(argv)
+
+    if opts.simulate:
+        print(f"{'perfil':<6} {'início':<7} {'estável':>8} {'mudanças':>9} {'fps':>6} {'latência':>9}  ponto final"
+              f"  (CPU de fundo 50% a partir da janela {opts.windows // 2})")
+        for r in run_simulations(opts.windows, opts.verbose):
+            s, h = r["summary"], r["first_half"]
+            print(f"{r['profile']:<6} {r['start']:<7} {h['settled_at']:>8} {s['changes']:>9} "
+                  f"{s['fps']:6.1f} {s['latency_ms']:7.1f}ms  escala {s['point']['proc_scale']:.2f}, "
+                  f"{s['point']['workers']} worker(s)")
+        return 0
+    if opts.live:
+        stats, rows = run_live(opts.live, opts.width, opts.height, engine_args=engine_args)
+        for i, (fps, latency_ms, cpu, point) in enumerate(rows):
+            cpu_text = f"{cpu:5.1f}%" if cpu is not None else "    -"
+            print(f"{i:>3}s {fps:5.1f} fps {latency_ms:6.1f} ms CPU {cpu_text}  "
+                  f"escala {point['proc_scale']:.2f}, {point['workers']} worker(s)")
+        print(f"{stats['frames_out']} quadros, {stats['dropped']} descartados")
+        return 0
+    parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
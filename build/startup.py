@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Abertura rápida da interface
+Cache dos ícones já redimensionados (PNG lido direto pelo Tk, sem PIL),
+marcas de tempo da inicialização e o benchmark de abertura: tempo até a
+primeira pintura, tempo até pronto e quanto custa cada import.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Com esta variável apontando para um arquivo, a interface grava as marcas e fecha quando fica pronta
+TRACE_ENV = "CAMALEAO_STARTUP_TRACE"
+T0_ENV = "CAMALEAO_STARTUP_T0"
+
+ROOT_DIR = Path(__file__).parent.parent
+
+# Dados que precisam sobreviver entre execuções (PIDs dos filhos, telemetria,
+# ícones em cache). No executável onefile a base_path é o _MEIPASS, uma pasta
+# temporária nova a cada abertura, e numa instalação em Program Files ela nem
+# aceita escrita.
+USER_DIR = Path.home() / ".camaleao"
+
+
+def cached_icon(src, size):
+    """
+    Caminho de um PNG size x size gerado a partir de src. O PNG fica ao lado
+    do original (ou no cache do usuário, se ali não der para gravar) e só é
+    gerado, com PIL importado aqui, quando não existe. Ao trocar o ícone,
+    apague os PNGs para que sejam refeitos.
+    """
+    src = Path(src)
+    name = f"{src.stem}_{size}.png"
+    candidates = [src.with_name(name), USER_DIR / "cache" / name]
+    for path in candidates:
+        if path.exists():
+            return str(path)
+
+    from PIL import Image
+
+    image = Image.open(src).convert("RGBA").resize((size, size), Image.Resampling.LANCZOS)
+    for path in candidates:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            image.save(path, "PNG")
+            return str(path)
+        except OSError:
+            continue
+    raise OSError(f"Não foi possível gravar o ícone em cache: {name}")
+
+
+class StartupTrace:
+    """
+    Marcas da inicialização em segundos desde o lançamento do processo
+    (T0_ENV, informado por quem lançou) ou desde a criação do trace.
+    Só grava se TRACE_ENV estiver definida.
+    """
+
+    def __init__(self):
+        self.path = os.environ.get(TRACE_ENV)
+        self.t0 = float(os.environ.get(T0_ENV, time.time()))
+        self.marks = {}
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = time.time() - self.t0
+
+    def save(self):
+        if not self.path:
+            return
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.marks, f)
+
+
+def measure_imports(module="blur_voice", cwd=None):
+    """
+    Roda `python -X importtime -c "import module"` num processo novo e devolve
+    {módulo: ms cumulativos} do próprio módulo e dos imports que ele dispara
+    diretamente, do mais caro para o mais barato.
+    """
+    cwd = cwd or str(Path(__file__).parent)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=cwd, capture_output=True, text=True)
+    pattern = re.compile(r"import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)")
+    children = {}
+    for line in result.stderr.splitlines():
+        match = pattern.match(line)
+        if match is None:
+            continue
+        cumulative, indent, name = match.groups()
+        depth = len(indent) // 2
+        # A saída lista os filhos antes do pai: os de profundidade 1 acumulados
+        # até a linha de profundidade 0 do módulo são os imports diretos dele
+        if depth == 1:
+            children[name] = int(cumulative) / 1000.0
+        elif depth == 0:
+            if name == module:
+                children[name] = int(cumulative) / 1000.0
+                return dict(sorted(children.items(), key=lambda kv: -kv[1]))
+            children = {}
+    raise RuntimeError(f"Falha ao importar {module}: {result.stderr.strip()[-300:]}")
+
+
+def measure_startup(runs=5, command=None, timeout=30.0):
+    """
+    Abre a interface `runs` vezes (main.py, ou o executável em command) com
+    TRACE_ENV definida e devolve as marcas de cada execução. Precisa de tela.
+    """
+    command = command or [sys.executable, str(ROOT_DIR / "main.py")]
+    trace_path = ROOT_DIR / "logs" / "startup_trace.json"
+    trace_path.parent.mkdir(parents=True, exist_ok=True)
+    results = []
+    for _ in range(runs):
+        if trace_path.exists():
+            trace_path.unlink()
+        env = dict(os.environ, **{TRACE_ENV: str(trace_path), T0_ENV: repr(time.time())})
+        proc = subprocess.run(command, env=env, capture_output=True, text=True, timeout=timeout)
+        if not trace_path.exists():
+            raise RuntimeError(f"A interface não gravou as marcas (código {proc.returncode}): "
+                               f"{proc.stderr.strip()[-300:]}")
+        with open(trace_path, "r", encoding="utf-8") as f:
+            results.append(json.load(f))
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de abertura do Camaleão")
+    parser.add_argument("--bench", action="store_true", help="Mede imports, primeira pintura e pronto")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--exe", help="Mede o executável gerado em vez do main.py")
+    opts = parser.parse_args(argv)
+    if not opts.bench:
+        parser.print_help()
+        return 0
+
+    print("Imports (ms cumulativos, processo novo):")
+    for name, ms in measure_imports().items():
+        print(f"  {name:<24} {ms:8.1f}")
+
+    import statistics
+
+    try:
+        runs = measure_startup(opts.runs, [opts.exe] if opts.exe else None)
+    except Exception as e:
+        print(f"Abertura não medida: {e}")
+        return 1
+    print(f"Abertura ({len(runs)} execuções, mediana / pior, s desde o lançamento):")
+    for name in runs[0]:
+        values = [r[name] for r in runs if name in r]
+        print(f"  {name:<24} {statistics.median(values):7.3f} / {max(values):7.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
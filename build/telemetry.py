@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Telemetria dos pipelines de vídeo e voz
+Tempos por estágio em buffers circulares de tamanho fixo (percentis baratos),
+contadores (quadros, descartes, underruns/overruns), CPU/RSS dos processos e
+exportação em JSON Lines para análise offline.
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+
+def percentile(sorted_values, q):
+    """Percentil q (0-100) com interpolação linear, como o padrão do numpy.percentile"""
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+class RingSeries:
+    """
+    Últimas `capacity` amostras em uma lista pré-alocada; add() é O(1) e não
+    aloca. Sem numpy, para não pesar na abertura da interface.
+    """
+
+    def __init__(self, capacity=512):
+        self.values = [0.0] * capacity
+        self.capacity = capacity
+        self.index = 0
+        self.count = 0
+
+    def add(self, value):
+        self.values[self.index] = value
+        self.index = (self.index + 1) % self.capacity
+        self.count += 1
+
+    def summary(self, percentiles=(50, 95, 99), last=None):
+        """Percentis das amostras guardadas, ou só das `last` mais recentes"""
+        n = min(self.count, self.capacity)
+        if last is not None:
+            n = min(n, last)
+        if n == 0:
+            return None
+        if last is None:
+            window = self.values[:n]
+        elif n <= self.index:
+            window = self.values[self.index - n:self.index]
+        else:
+            window = self.values[self.index - n:] + self.values[:self.index]
+        window = sorted(window)
+        result = {f"p{q}": percentile(window, q) for q in percentiles}
+        result["last"] = self.values[self.index - 1]
+        result["count"] = self.count
+        return result
+
+
+class Telemetry:
+    """
+    Registro central. record()/count() ficam no caminho quente e são só
+    escrita em array/dicionário; percentis e taxas são calculados em snapshot().
+    Tempos são gravados em segundos e reportados em milissegundos.
+    """
+
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self.series = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+        self._last_counts = {}
+        self._last_time = time.perf_counter()
+
+    def record(self, name, seconds):
+        series = self.series.get(name)
+        if series is None:
+            with self.lock:
+                series = self.series.setdefault(name, RingSeries(self.capacity))
+        series.add(seconds)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def clear(self, prefix=""):
+        """Descarta séries e contadores que começam com prefix (fim de uma sessão)"""
+        with self.lock:
+            for store in (self.series, self.counters, self._last_counts):
+                for name in [n for n in store if n.startswith(prefix)]:
+                    del store[name]
+
+    def snapshot(self):
+        """Resumo atual: percentis em ms, contadores e taxas por segundo desde o último snapshot"""
+        now = time.perf_counter()
+        elapsed = now - self._last_time
+        with self.lock:
+            series = dict(self.series)
+        summaries = {}
+        for name, s in series.items():
+            summary = s.summary()
+            if summary is not None:
+                summaries[name] = {k: (v * 1000.0 if k != "count" else v) for k, v in summary.items()}
+        counters = dict(self.counters)
+        rates = {}
+        if elapsed > 0:
+            for name, value in counters.items():
+                rates[name] = (value - self._last_counts.get(name, 0)) / elapsed
+        self._last_counts = counters
+        self._last_time = now
+        return {"time": time.time(), "series_ms": summaries, "counters": counters, "rates": rates}
+
+
+class ProcessMonitor:
+    """CPU (%) e RSS (MB) por processo via psutil (dependência opcional)"""
+
+    def __init__(self):
+        try:
+            import psutil
+        except ImportError:
+            psutil = None
+        self.psutil = psutil
+        self.handles = {}
+
+    @property
+    def available(self):
+        return self.psutil is not None
+
+    def system_cpu(self):
+        """Uso total de CPU da máquina (%) desde a chamada anterior, ou None sem psutil"""
+        if self.psutil is None:
+            return None
+        return self.psutil.cpu_percent(None)
+
+    def sample(self, pids):
+        """pids: {nome: pid}; devolve {nome: {"pid", "cpu", "rss_mb"}}"""
+        if self.psutil is None:
+            return {}
+        result = {}
+        for name, pid in pids.items():
+            proc = self.handles.get(pid)
+            try:
+                if proc is None:
+                    # A primeira leitura de cpu_percent é sempre 0; as seguintes medem o intervalo
+                    proc = self.handles[pid] = self.psutil.Process(pid)
+                    proc.cpu_percent(None)
+                result[name] = {"pid": pid, "cpu": proc.cpu_percent(None),
+                                "rss_mb": proc.memory_info().rss / (1024 * 1024)}
+            except (self.psutil.NoSuchProcess, self.psutil.AccessDenied):
+                self.handles.pop(pid, None)
+        for pid in list(self.handles):
+            if pid not in pids.values():
+                del self.handles[pid]
+        return result
+
+
+class JsonlExporter:
+    """
+    Acrescenta um snapshot por linha em um arquivo JSON Lines. A pasta só é
+    criada na primeira escrita; write() devolve False (sem levantar) se não
+    for possível gravar, e a falha fica em self.error.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.error = None
+
+    def write(self, snapshot):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
+        except OSError as e:
+            self.error = e
+            return False
+        self.error = None
+        return True
+
+
+def format_panel(snapshot, processes=None):
+    """Texto compacto do painel de desempenho da interface"""
+    series = snapshot["series_ms"]
+    counters = snapshot["counters"]
+    rates = snapshot["rates"]
+
+    def stage(name, label):
+        s = series.get(name)
+        return f"{label} {s['p50']:.1f}/{s['p95']:.1f}" if s else f"{label} -"
+
+    lines = []
+    if "video.frames" in counters:
+        lines.append(f"Vídeo  {rates.get('video.frames', 0.0):4.1f} fps  "
+                     f"{stage('video.capture', 'captura')}  {stage('video.blur', 'desfoque')}  "
+                     f"{stage('video.output', 'saída')} ms  descartados {counters.get('video.dropped', 0)}")
+        if "video.failsafe" in counters:
+            lines[-1] += f"  tela inteira {counters['video.failsafe']}"
+    if "audio.blocks" in counters:
+        lines.append(f"Voz    {stage('audio.input', 'entrada')}  {stage('audio.dsp', 'DSP')}  "
+                     f"{stage('audio.output', 'saída')} ms  underruns {counters.get('audio.underruns', 0)}  "
+                     f"overruns {counters.get('audio.overruns', 0)}")
+    for name, p in (processes or {}).items():
+        lines.append(f"{name:<12} PID {p['pid']:<6} CPU {p['cpu']:5.1f}%  RSS {p['rss_mb']:6.1f} MB")
+    if not lines:
+        lines.append("Sem dados (ligue o desfoque ou a voz)")
+    return "\n".join(lines)
+
+
+def measure_overhead(calls=200000):
+    """Custo por chamada de record()/count() e por snapshot(), em ns/us"""
+    telemetry = Telemetry()
+    perf_counter = time.perf_counter
+    t0 = perf_counter()
+    for _ in range(calls):
+        telemetry.record("stage", 0.001)
+    record_ns = (perf_counter() - t0) / calls * 1e9
+
+    t0 = perf_counter()
+    for _ in range(calls):
+        telemetry.count("frames")
+    count_ns = (perf_counter() - t0) / calls * 1e9
+
+    for i in range(8):
+        for _ in range(telemetry.capacity):
+            telemetry.record(f"stage{i}", 0.001)
+    t0 = perf_counter()
+    for _ in range(100):
+        telemetry.snapshot()
+    snapshot_us = (perf_counter() - t0) / 100 * 1e6
+    return {"record_ns": record_ns, "count_ns": count_ns, "snapshot_us": snapshot_us}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Telemetria do Camaleão")
+    parser.add_argument("--bench", action="store_true", help="Mede o custo da instrumentação")
+    opts = parser.parse_args(argv)
+    if opts.bench:
+        r = measure_overhead()
+        # Pipeline de vídeo: 4 tempos + 2 contadores por quadro
+        per_frame_us = (4 * r["record_ns"] + 2 * r["count_ns"]) / 1000.0
+        print(f"record():   {r['record_ns']:8.0f} ns")
+        print(f"count():    {r['count_ns']:8.0f} ns")
+        print(f"snapshot(): {r['snapshot_us']:8.1f} us (8 séries, 1x por segundo)")
+        print(f"Por quadro: {per_frame_us:8.2f} us = {per_frame_us / 33333 * 100:.4f}% de um quadro a 30 fps")
+        return 0
+    parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
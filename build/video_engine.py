@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+"""
+Motor de desfoque de vídeo em Python/NumPy
+Alternativa in-process ao BlurCamOptDbg.exe, aceitando as mesmas opções
+(--mode box --blur 90 --capture-scale 0.4 --proc-scale 0.4 --gamma 0.8 --dim 0.22)
+e com o modo face (só os rostos desfocados, ver face_blur.py)
+"""
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+
+def build_arg_parser():
+    """Cria o parser com as opções compatíveis com o BlurCamOptDbg.exe"""
+    parser = argparse.ArgumentParser(description="Desfoque de vídeo em Python/NumPy")
+    parser.add_argument("--mode", default="box", choices=["box", "face"])
+    parser.add_argument("--blur", type=float, default=90)
+    parser.add_argument("--capture-scale", type=float, default=0.4)
+    parser.add_argument("--proc-scale", type=float, default=0.4)
+    parser.add_argument("--gamma", type=float, default=0.8)
+    parser.add_argument("--dim", type=float, default=0.22)
+    parser.add_argument("--threads", type=int, default=1)
+    # Modo face (só o motor Python)
+    parser.add_argument("--detect-every", type=int, default=5)
+    parser.add_argument("--detector", default="auto", choices=["auto", "haar", "skin"])
+    parser.add_argument("--face-pad", type=float, default=0.3)
+    return parser
+
+
+def build_gamma_lut(gamma, dim):
+    """Tabela de 256 entradas com gamma e escurecimento (dim) já combinados"""
+    x = np.arange(256, dtype=np.float64) / 255.0
+    lut = np.power(x, gamma) * (1.0 - dim) * 255.0
+    return np.clip(np.rint(lut), 0, 255).astype(np.uint8)
+
+
+def resize_indices(src_size, dst_size):
+    """Índices de amostragem (vizinho mais próximo, centrado) para um eixo"""
+    idx = ((np.arange(dst_size) + 0.5) * (src_size / dst_size)).astype(np.intp)
+    return np.minimum(idx, src_size - 1)
+
+
+def box_blur_rows(img, radius, y0=0, y1=None):
+    """
+    Desfoque box separável das linhas y0:y1 de img usando somas acumuladas.
+    O custo não depende do raio; só as linhas de halo (y0-radius..y1+radius)
+    são lidas e as bordas da imagem são replicadas.
+    """
+    h, w = img.shape[:2]
+    if y1 is None:
+        y1 = h
+    r = int(radius)
+    if r <= 0:
+        return img[y0:y1].astype(np.float32)
+
+    k = 2 * r + 1
+    top, bottom = y0 - r, y1 + r
+    src = img[max(top, 0):min(bottom, h)]
+    pad = [(max(0, -top), max(0, bottom - h)), (0, 0)] + [(0, 0)] * (img.ndim - 2)
+    if pad[0] != (0, 0):
+        src = np.pad(src, pad, mode="edge")
+
+    # Passada vertical: janela deslizante sobre a tabela de somas. A soma
+    # acumulada é feita linha a linha (cada np.add é contíguo), bem mais
+    # rápido que np.cumsum(axis=0) em arrays C-contíguos.
+    acc = np.zeros((src.shape[0] + 1,) + src.shape[1:], dtype=np.int32)
+    acc[1:] = src
+    for i in range(1, acc.shape[0]):
+        np.add(acc[i], acc[i - 1], out=acc[i])
+    vert = acc[k:] - acc[:-k]
+
+    # Passada horizontal sobre as linhas já reduzidas (coluna 0 zerada faz
+    # o papel do zero inicial da tabela, permitindo cumsum in-place)
+    pad = [(0, 0), (r + 1, r)] + [(0, 0)] * (img.ndim - 2)
+    acc = np.pad(vert, pad, mode="edge")
+    acc[:, 0] = 0
+    np.cumsum(acc, axis=1, out=acc)
+    out = (acc[:, k:] - acc[:, :-k]).astype(np.float32)
+    out *= 1.0 / (k * k)
+    return out
+
+
+class BlurEngine:
+    """
+    Desfoque box + gamma + dim em resolução reduzida.
+
+    Escalas são relativas ao tamanho de saída: a câmera é lida em
+    capture_scale, o desfoque roda em proc_scale e o resultado é ampliado
+    de volta. O raio (--blur) é expresso em pixels da saída, então a
+    aparência não muda quando proc_scale muda.
+
+    Em mode="face" process() delega para um FaceBlur, que desfoca só as
+    regiões de rosto e volta ao quadro inteiro (blur_full) no fail-safe.
+    Nesse modo o fundo sai na resolução capturada, então use
+    capture_scale 1.0.
+    """
+
+    def __init__(self, mode="box", blur=90, capture_scale=0.4, proc_scale=0.4,
+                 gamma=0.8, dim=0.22, detect_every=5, detector="auto", face_pad=0.3):
+        if mode not in ("box", "face"):
+            raise ValueError(f"Modo não suportado: {mode}")
+        self.mode = mode
+        self.blur = float(blur)
+        self.capture_scale = float(capture_scale)
+        self.proc_scale = float(proc_scale)
+        self.gamma = float(gamma)
+        self.dim = float(dim)
+        self.lut = build_gamma_lut(self.gamma, self.dim)
+        self._index_cache = {}
+        self.face = None
+        if mode == "face":
+            from face_blur import FaceBlur
+            self.face = FaceBlur(self, detect_every=detect_every, detector=detector, pad=face_pad)
+
+    @classmethod
+    def from_args(cls, args):
+        """Cria o motor a partir da mesma lista de argumentos do BlurCamOptDbg.exe"""
+        opts, _ = build_arg_parser().parse_known_args(args)
+        return cls(mode=opts.mode, blur=opts.blur, capture_scale=opts.capture_scale,
+                   proc_scale=opts.proc_scale, gamma=opts.gamma, dim=opts.dim,
+                   detect_every=opts.detect_every, detector=opts.detector, face_pad=opts.face_pad)
+
+    def update(self, blur=None, gamma=None, dim=None, proc_scale=None):
+        """Altera parâmetros ao vivo; valem a partir do próximo quadro processado"""
+        if blur is not None:
+            self.blur = float(blur)
+        if proc_scale is not None:
+            self.proc_scale = float(proc_scale)
+        if gamma is not None or dim is not None:
+            self.gamma = self.gamma if gamma is None else float(gamma)
+            self.dim = self.dim if dim is None else float(dim)
+            self.lut = build_gamma_lut(self.gamma, self.dim)
+
+    @property
+    def radius(self):
+        """Raio do box em pixels da resolução de processamento"""
+        return max(0, int(round(self.blur * self.proc_scale)))
+
+    def capture_size(self, width, height):
+        """Resolução a pedir à câmera para uma saída width x height"""
+        return (max(1, int(round(width * self.capture_scale))),
+                max(1, int(round(height * self.capture_scale))))
+
+    def proc_size(self, width, height):
+        """Resolução de processamento para uma saída width x height"""
+        return (max(1, int(round(width * self.proc_scale))),
+                max(1, int(round(height * self.proc_scale))))
+
+    def output_size(self, frame):
+        """Tamanho de saída implícito de um quadro capturado"""
+        h, w = frame.shape[:2]
+        return (int(round(w / self.capture_scale)), int(round(h / self.capture_scale)))
+
+    def _indices(self, src_w, src_h, dst_w, dst_h):
+        key = (src_w, src_h, dst_w, dst_h)
+        idx = self._index_cache.get(key)
+        if idx is None:
+            if len(self._index_cache) >= 512:
+                # Modo face: cada tamanho de região gera entradas novas
+                self._index_cache.clear()
+            idx = (resize_indices(src_h, dst_h), resize_indices(src_w, dst_w))
+            self._index_cache[key] = idx
+        return idx
+
+    def resize(self, frame, width, height):
+        """Redimensiona por vizinho mais próximo com índices pré-calculados"""
+        h, w = frame.shape[:2]
+        if (w, h) == (width, height):
+            return frame
+        ys, xs = self._indices(w, h, width, height)
+        if width * height > w * h:
+            # Ampliando: colunas primeiro, deixando a cópia de linhas inteiras por último
+            return np.take(np.take(frame, xs, axis=1), ys, axis=0)
+        return np.take(np.take(frame, ys, axis=0), xs, axis=1)
+
+    def downscale(self, frame, out_size=None):
+        """Reduz um quadro capturado para a resolução de processamento"""
+        width, height = out_size or self.output_size(frame)
+        return self.resize(frame, *self.proc_size(width, height))
+
+    def apply_lut(self, blurred):
+        """Converte o resultado do box para uint8 aplicando gamma/dim"""
+        blurred += 0.5
+        return np.take(self.lut, blurred.astype(np.uint8))
+
+    def blur_rows(self, small, y0=0, y1=None):
+        """Desfoca (e aplica gamma/dim) as linhas y0:y1 do quadro reduzido"""
+        return self.apply_lut(box_blur_rows(small, self.radius, y0, y1))
+
+    def upscale(self, small, width, height):
+        """Amplia o quadro processado para a resolução de saída"""
+        return self.resize(small, width, height)
+
+    def process(self, frame, out_size=None):
+        """Processa um quadro: inteiro (box) ou só os rostos (face)"""
+        if self.face is not None:
+            return self.face.process(frame, out_size or self.output_size(frame))
+        return self.blur_full(frame, out_size)
+
+    def close(self):
+        """Libera a thread do detector do modo face"""
+        if self.face is not None:
+            self.face.close()
+
+    def blur_full(self, frame, out_size=None):
+        """Processa um quadro completo: reduz, desfoca, aplica LUT e amplia"""
+        width, height = out_size or self.output_size(frame)
+        return self.upscale(self.blur_rows(self.downscale(frame, (width, height))), width, height)
+
+
+class FrameSource:
+    """Origem de quadros: read() devolve um ndarray HxWx3 uint8, ou None quando acabar"""
+
+    width = 0
+    height = 0
+    fps = 30.0
+
+    def read(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class FrameSink:
+    """Destino de quadros: write() recebe um ndarray HxWx3 uint8"""
+
+    def write(self, frame):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SyntheticSource(FrameSource):
+    """
+    Gera quadros sintéticos (gradiente + bloco em movimento) para uso headless.
+    Com realtime=True entrega no ritmo de fps, como uma câmera.
+    """
+
+    def __init__(self, width=1280, height=720, frames=None, fps=30.0, realtime=False):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frames = frames
+        self.realtime = realtime
+        self.count = 0
+        self.next_at = None
+        yy, xx = np.mgrid[0:height, 0:width]
+        base = np.empty((height, width, 3), dtype=np.uint8)
+        base[..., 0] = (xx * 255 // max(1, width - 1)).astype(np.uint8)
+        base[..., 1] = (yy * 255 // max(1, height - 1)).astype(np.uint8)
+        base[..., 2] = ((xx ^ yy) & 0xFF).astype(np.uint8)
+        self.base = base
+        self.frame = np.empty_like(base)
+
+    def read(self):
+        if self.frames is not None and self.count >= self.frames:
+            return None
+        if self.realtime:
+            now = time.perf_counter()
+            if self.next_at is None:
+                self.next_at = now
+            elif self.next_at > now:
+                time.sleep(self.next_at - now)
+            self.next_at += 1.0 / self.fps
+        np.copyto(self.frame, self.base)
+        size = max(8, self.height // 4)
+        x = (self.count * 7) % max(1, self.width - size)
+        y = (self.count * 3) % max(1, self.height - size)
+        self.frame[y:y + size, x:x + size] = 255
+        self.count += 1
+        return self.frame
+
+
+class CameraSource(FrameSource):
+    """Captura da webcam via OpenCV (dependência opcional)"""
+
+    def __init__(self, index=0, width=1280, height=720, fps=30.0):
+        try:
+            import cv2
+        except ImportError:
+            raise RuntimeError("OpenCV não instalado (pip install opencv-python)")
+        self._cv2 = cv2
+        self.cap = cv2.VideoCapture(index)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Câmera {index} não encontrada")
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        self.cap.set(cv2.CAP_PROP_FPS, fps)
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or fps
+
+    def read(self):
+        ok, frame = self.cap.read()
+        if not ok:
+            return None
+        return self._cv2.cvtColor(frame, self._cv2.COLOR_BGR2RGB)
+
+    def close(self):
+        self.cap.release()
+
+
+class VideoFileSource(FrameSource):
+    """Quadros de um vídeo gravado via OpenCV (dependência opcional), no máximo `frames`"""
+
+    def __init__(self, path, frames=None):
+        try:
+            import cv2
+        except ImportError:
+            raise RuntimeError("OpenCV não instalado (pip install opencv-python)")
+        self._cv2 = cv2
+        self.cap = cv2.VideoCapture(path)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Vídeo não encontrado: {path}")
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        self.frames = frames
+        self.count = 0
+
+    def read(self):
+        if self.frames is not None and self.count >= self.frames:
+            return None
+        ok, frame = self.cap.read()
+        if not ok:
+            return None
+        self.count += 1
+        return self._cv2.cvtColor(frame, self._cv2.COLOR_BGR2RGB)
+
+    def close(self):
+        self.cap.release()
+
+
+class NullSink(FrameSink):
+    """Descarta os quadros (benchmark)"""
+
+    def __init__(self):
+        self.count = 0
+
+    def write(self, frame):
+        self.count += 1
+
+
+class ArraySink(FrameSink):
+    """Guarda o último quadro recebido"""
+
+    def __init__(self):
+        self.count = 0
+        self.last = None
+
+    def write(self, frame):
+        self.count += 1
+        self.last = frame
+
+
+class VirtualCameraSink(FrameSink):
+    """Envia quadros para uma câmera virtual via pyvirtualcam (dependência opcional)"""
+
+    def __init__(self, width, height, fps=30.0):
+        try:
+            import pyvirtualcam
+        except ImportError:
+            raise RuntimeError("pyvirtualcam não instalado (pip install pyvirtualcam)")
+        self.cam = pyvirtualcam.Camera(width=width, height=height, fps=fps)
+
+    def write(self, frame):
+        self.cam.send(frame)
+
+    def close(self):
+        self.cam.close()
+
+
+def run_engine(engine, source, sink, max_frames=None, out_size=None, stop_event=None,
+               telemetry=None, control=None):
+    """
+    Laço simples captura -> processamento -> saída; devolve estatísticas por
+    etapa. Com telemetry grava os mesmos tempos/contadores do FramePipeline
+    (mais video.failsafe no modo face); com control (ControlChannel) aplica
+    blur/gamma/dim recebidos antes de cada quadro.
+    """
+    timings = {"capture": [], "process": [], "output": []}
+    frames = 0
+    start = time.perf_counter()
+    try:
+        while max_frames is None or frames < max_frames:
+            if stop_event is not None and stop_event.is_set():
+                break
+            t0 = time.perf_counter()
+            frame = source.read()
+            if frame is None:
+                break
+            t1 = time.perf_counter()
+            params = control.poll() if control is not None else None
+            if params:
+                engine.update(**params)
+            size = out_size or engine.output_size(frame)
+            result = engine.process(frame, size)
+            t2 = time.perf_counter()
+            sink.write(result)
+            t3 = time.perf_counter()
+            timings["capture"].append(t1 - t0)
+            timings["process"].append(t2 - t1)
+            timings["output"].append(t3 - t2)
+            frames += 1
+            if telemetry is not None:
+                telemetry.record("video.capture", t1 - t0)
+                telemetry.record("video.blur", t2 - t1)
+                telemetry.record("video.output", t3 - t2)
+                telemetry.record("video.latency", t3 - t1)
+                telemetry.count("video.frames")
+                if engine.face is not None and engine.face.failsafe:
+                    telemetry.count("video.failsafe")
+    finally:
+        source.close()
+        sink.close()
+        engine.close()
+    elapsed = time.perf_counter() - start
+    stats = {"frames": frames, "fps": frames / elapsed if elapsed > 0 else 0.0}
+    for stage, values in timings.items():
+        if values:
+            ms = np.array(values) * 1000.0
+            stats[stage + "_ms"] = float(ms.mean())
+            stats[stage + "_p95_ms"] = float(np.percentile(ms, 95))
+    return stats
+
+
+def benchmark(engine, resolutions=((1280, 720), (1920, 1080)), frames=120, fps=30.0):
+    """Mede o custo por quadro em cada resolução de saída contra o orçamento do fps"""
+    budget_ms = 1000.0 / fps
+    results = []
+    for width, height in resolutions:
+        cap_w, cap_h = engine.capture_size(width, height)
+        source = SyntheticSource(cap_w, cap_h, frames=frames)
+        stats = run_engine(engine, source, NullSink(), out_size=(width, height))
+        stats.update({"width": width, "height": height, "budget_ms": budget_ms})
+        results.append(stats)
+    return results
+
+
+def main(argv=None):
+    parser = build_arg_parser()
+    parser.add_argument("--source", default="synthetic", choices=["synthetic", "camera"])
+    parser.add_argument("--sink", default="null", choices=["null", "virtualcam"])
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--frames", type=int, default=None)
+    parser.add_argument("--bench", action="store_true", help="Mede o custo por quadro em 720p e 1080p")
+    opts = parser.parse_args(argv)
+
+    engine = BlurEngine(mode=opts.mode, blur=opts.blur, capture_scale=opts.capture_scale,
+                        proc_scale=opts.proc_scale, gamma=opts.gamma, dim=opts.dim,
+                        detect_every=opts.detect_every, detector=opts.detector, face_pad=opts.face_pad)
+
+    if opts.bench:
+        print(f"{'resolução':>10} {'captura':>9} {'process.':>9} {'p95':>9} {'orçamento':>10}")
+        for r in benchmark(engine, frames=opts.frames or 120):
+            print(f"{r['width']}x{r['height']:<5} {r['capture_ms']:8.2f}ms {r['process_ms']:8.2f}ms "
+                  f"{r['process_p95_ms']:8.2f}ms {r['budget_ms']:9.2f}ms")
+        return 0
+
+    cap_w, cap_h = engine.capture_size(opts.width, opts.height)
+    if opts.source == "camera":
+        source = CameraSource(width=cap_w, height=cap_h)
+    else:
+        source = SyntheticSource(cap_w, cap_h, frames=opts.frames)
+    if opts.sink == "virtualcam":
+        sink = VirtualCameraSink(opts.width, opts.height, source.fps)
+    else:
+        sink = NullSink()
+
+    stats = run_engine(engine, source, sink, max_frames=opts.frames,
+                       out_size=(opts.width, opts.height))
+    print(f"{stats['frames']} quadros, {stats['fps']:.1f} fps")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""
+Pipeline de vídeo em estágios: captura -> redução -> desfoque -> saída
+O desfoque é dividido em faixas horizontais (com linhas de halo) entre
+processos de um pool; os quadros trafegam por slots de memória compartilhada
+em vez de serem serializados.
+"""
+
+import argparse
+import collections
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from control_channel import ControlChannel
+from telemetry import Telemetry
+from video_engine import BlurEngine, NullSink, SyntheticSource, box_blur_rows, build_gamma_lut
+
+
+class QueueClosed(Exception):
+    """Fila encerrada e vazia"""
+
+
+class DropOldestQueue:
+    """
+    Fila limitada entre estágios. Com drop_late=True, put() nunca bloqueia:
+    se a fila estiver cheia o item mais antigo é descartado e devolvido,
+    mantendo a latência limitada. Com drop_late=False, put() aplica
+    contrapressão e espera espaço.
+    """
+
+    def __init__(self, maxsize=2, drop_late=True):
+        self.maxsize = maxsize
+        self.drop_late = drop_late
+        self.items = collections.deque()
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def put(self, item):
+        """Enfileira item; devolve o item descartado (ou None)"""
+        with self.cond:
+            dropped = None
+            while len(self.items) >= self.maxsize and not self.closed:
+                if self.drop_late:
+                    dropped = self.items.popleft()
+                    break
+                self.cond.wait()
+            if self.closed:
+                return item
+            self.items.append(item)
+            self.cond.notify_all()
+            return dropped
+
+    def get(self):
+        """Retira o próximo item; levanta QueueClosed quando encerrada e vazia"""
+        with self.cond:
+            while not self.items:
+                if self.closed:
+                    raise QueueClosed()
+                self.cond.wait()
+            item = self.items.popleft()
+            self.cond.notify_all()
+            return item
+
+    def drain(self):
+        """Remove e devolve todos os itens pendentes"""
+        with self.cond:
+            items = list(self.items)
+            self.items.clear()
+            self.cond.notify_all()
+            return items
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
+class SharedFrameRing:
+    """
+    Slots de quadros em memória compartilhada. Cada slot tem um buffer de
+    entrada (quadro reduzido) e um de saída (quadro desfocado) do mesmo shape.
+    A memória é reservada para max_shape, o que permite reshape() para
+    quadros menores sem realocar nem reabrir nos workers.
+    """
+
+    def __init__(self, slots, shape, name=None, max_shape=None):
+        self.slots = slots
+        self.owner = name is None
+        capacity = int(np.prod(max_shape or shape))
+        # Os workers são filhos deste processo e compartilham o mesmo
+        # resource_tracker, então só o dono faz unlink no close()
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner,
+                                              size=2 * slots * capacity if self.owner else 0)
+        self.name = self.shm.name
+        self.reshape(shape)
+        self.free = collections.deque(range(slots))
+        self.cond = threading.Condition()
+
+    def reshape(self, shape):
+        """Refaz as vistas dos slots para outro shape; só com todos os slots livres"""
+        shape = tuple(shape)
+        frame_bytes = int(np.prod(shape))
+        if 2 * self.slots * frame_bytes > self.shm.size:
+            raise ValueError(f"Quadro {shape} maior que a memória reservada")
+        self.shape = shape
+        self.inputs = np.ndarray((self.slots,) + shape, dtype=np.uint8, buffer=self.shm.buf)
+        self.outputs = np.ndarray((self.slots,) + shape, dtype=np.uint8, buffer=self.shm.buf,
+                                  offset=self.slots * frame_bytes)
+
+    def wait_idle(self, timeout=None):
+        """Espera todos os slots serem liberados; devolve False se o tempo esgotar"""
+        with self.cond:
+            return self.cond.wait_for(lambda: len(self.free) == self.slots, timeout)
+
+    def acquire(self, timeout=None):
+        """Reserva um slot livre; devolve None se o tempo esgotar"""
+        with self.cond:
+            if not self.cond.wait_for(lambda: self.free, timeout):
+                return None
+            return self.free.popleft()
+
+    def release(self, slot):
+        with self.cond:
+            self.free.append(slot)
+            self.cond.notify_all()
+
+    def close(self):
+        self.inputs = self.outputs = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# Estado de cada processo do pool: ring aberto e LUTs já calculadas
+_worker_ring = None
+_worker_luts = {}
+
+
+def _warmup(_=None):
+    return os.getpid()
+
+
+def _blur_stripe(name, slots, shape, slot, y0, y1, radius, gamma, dim):
+    """Desfoca as linhas y0:y1 do slot, lendo o halo direto da memória compartilhada"""
+    global _worker_ring
+    if _worker_ring is None or _worker_ring.name != name:
+        if _worker_ring is not None:
+            _worker_ring.close()
+        _worker_ring = SharedFrameRing(slots, shape, name=name)
+    elif _worker_ring.shape != tuple(shape):
+        _worker_ring.reshape(shape)
+    lut = _worker_luts.get((gamma, dim))
+    if lut is None:
+        lut = _worker_luts[(gamma, dim)] = build_gamma_lut(gamma, dim)
+    blurred = box_blur_rows(_worker_ring.inputs[slot], radius, y0, y1)
+    blurred += 0.5
+    np.take(lut, blurred.astype(np.uint8), out=_worker_ring.outputs[slot, y0:y1])
+    return y1 - y0
+
+
+def split_stripes(height, count):
+    """Divide height linhas em count faixas contíguas de tamanho próximo"""
+    count = max(1, min(count, height))
+    bounds = np.linspace(0, height, count + 1).astype(int)
+    return [(int(bounds[i]), int(bounds[i + 1])) for i in range(count)]
+
+
+class FramePipeline:
+    """
+    Pipeline captura -> redução -> desfoque -> saída, um thread por estágio,
+    ligados por filas DropOldestQueue. Com workers > 1 o desfoque roda num
+    pool de processos, uma faixa horizontal por tarefa. Parâmetros do
+    desfoque (blur/gamma/dim) mudam ao vivo via set_params(), a partir do
+    próximo quadro desfocado. O ponto de operação também muda ao vivo:
+    workers (até max_workers, o tamanho do pool) vale no próximo quadro e
+    proc_scale (até max_proc_scale) espera os quadros em trânsito saírem
+    para trocar a resolução dos slots.
+    """
+
+    def __init__(self, engine, source, sink, workers=1, queue_size=2, drop_late=True,
+                 max_latency=None, out_size=None, telemetry=None, max_workers=None,
+                 max_proc_scale=None):
+        if engine.mode != "box":
+            # As faixas cobrem o quadro inteiro; o modo face roda em run_engine
+            raise ValueError(f"Modo não suportado pelo pipeline: {engine.mode}")
+        self.engine = engine
+        self.source = source
+        self.sink = sink
+        self.workers = max(1, int(workers))
+        self.max_workers = max(self.workers, int(max_workers or 0))
+        self.max_proc_scale = max(engine.proc_scale, max_proc_scale or 0.0)
+        self.queue_size = queue_size
+        self.drop_late = drop_late
+        self.max_latency = max_latency
+        self.out_size = out_size or (int(round(source.width / engine.capture_scale)),
+                                     int(round(source.height / engine.capture_scale)))
+
+        self.q_capture = DropOldestQueue(queue_size, drop_late)
+        self.q_blur = DropOldestQueue(queue_size, drop_late)
+        self.q_output = DropOldestQueue(queue_size, drop_late)
+        # Slots: duas filas cheias + um em uso por estágio (redução, desfoque, saída)
+        proc_w, proc_h = engine.proc_size(*self.out_size)
+        max_w, max_h = self._proc_size(self.max_proc_scale)
+        self.ring = SharedFrameRing(2 * queue_size + 3, (proc_h, proc_w, 3), max_shape=(max_h, max_w, 3))
+        self.stripes = split_stripes(proc_h, self.workers)
+        self.pool = None
+        self.control = ControlChannel()
+        # proc_scale é aplicado pelo estágio de redução, que produz os quadros nos slots
+        self.scale_control = ControlChannel()
+        self.generation = 0
+        self.telemetry = telemetry if telemetry is not None else Telemetry()
+
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.lock = threading.Lock()
+        self.frames_in = 0
+        self.frames_out = 0
+        self.dropped = 0
+        self.output_times = collections.deque(maxlen=4096)
+        self.switch_latencies = collections.deque(maxlen=64)
+        self.started_at = None
+        self.finished_at = None
+        self.error = None
+
+    def _proc_size(self, proc_scale):
+        width, height = self.out_size
+        return (max(1, int(round(width * proc_scale))), max(1, int(round(height * proc_scale))))
+
+    def start(self):
+        if self.max_workers > 1:
+            self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            # Sobe os processos antes do primeiro quadro
+            list(self.pool.map(_warmup, [None] * self.max_workers))
+        self.started_at = time.perf_counter()
+        for target in (self._capture_loop, self._downscale_loop, self._blur_loop, self._output_loop):
+            t = threading.Thread(target=self._guard, args=(target,), daemon=True)
+            t.start()
+            self.threads.append(t)
+
+    def set_params(self, **params):
+        """Altera blur/gamma/dim, workers e proc_scale sem reiniciar o pipeline"""
+        proc_scale = params.pop("proc_scale", None)
+        if proc_scale is not None:
+            self.scale_control.send(proc_scale=min(float(proc_scale), self.max_proc_scale))
+        if params:
+            self.control.send(**params)
+
+    def _guard(self, target):
+        try:
+            target()
+        except QueueClosed:
+            pass
+        except Exception as e:
+            self.error = e
+            self.stop_event.set()
+            for q in (self.q_capture, self.q_blur, self.q_output):
+                q.close()
+
+    def _drop(self, item, holds_slot):
+        if item is None:
+            return
+        with self.lock:
+            self.dropped += 1
+            self.telemetry.count("video.dropped")
+        if holds_slot:
+            self.ring.release(item[1])
+
+    def _capture_loop(self):
+        try:
+            while not self.stop_event.is_set():
+                t0 = time.perf_counter()
+                frame = self.source.read()
+                if frame is None:
+                    break
+                self.telemetry.record("video.capture", time.perf_counter() - t0)
+                with self.lock:
+                    self.frames_in += 1
+                # Copia: algumas origens reutilizam o mesmo buffer a cada leitura
+                self._drop(self.q_capture.put((time.perf_counter(), np.array(frame))), False)
+        finally:
+            self.q_capture.close()
+
+    def _downscale_loop(self):
+        try:
+            while True:
+                stamp, frame = self.q_capture.get()
+                params = self.scale_control.poll()
+                if params:
+                    self._set_proc_scale(params["proc_scale"])
+                slot = None
+                while slot is None and not self.stop_event.is_set():
+                    slot = self.ring.acquire(timeout=0.1)
+                if slot is None:
+                    break
+                t0 = time.perf_counter()
+                np.copyto(self.ring.inputs[slot], self.engine.downscale(frame, self.out_size))
+                self.telemetry.record("video.downscale", time.perf_counter() - t0)
+                self._drop(self.q_blur.put((stamp, slot)), True)
+        finally:
+            self.q_blur.close()
+
+    def _set_proc_scale(self, proc_scale):
+        """Troca a resolução de processamento depois que os quadros em trânsito saem"""
+        t0 = time.perf_counter()
+        while not self.ring.wait_idle(timeout=0.1):
+            if self.stop_event.is_set():
+                return
+        proc_w, proc_h = self._proc_size(proc_scale)
+        self.engine.update(proc_scale=proc_scale)
+        self.ring.reshape((proc_h, proc_w, 3))
+        self.stripes = split_stripes(proc_h, self.workers)
+        self.generation += 1
+        self.telemetry.record("video.reconfigure", time.perf_counter() - t0)
+
+    def _blur_loop(self):
+        try:
+            while True:
+                stamp, slot = self.q_blur.get()
+                if self.max_latency is not None and time.perf_counter() - stamp > self.max_latency:
+                    self._drop((stamp, slot), True)
+                    continue
+                params = self.control.poll()
+                if params:
+                    workers = params.pop("workers", None)
+                    if workers is not None:
+                        self.workers = max(1, min(int(workers), self.max_workers))
+                        self.stripes = split_stripes(self.ring.shape[0], self.workers)
+                    if params:
+                        self.engine.update(**params)
+                    self.generation += 1
+                    sent_at = self.control.last_sent_at
+                else:
+                    sent_at = None
+                t0 = time.perf_counter()
+                self.blur_slot(slot)
+                self.telemetry.record("video.blur", time.perf_counter() - t0)
+                self._drop(self.q_output.put((stamp, slot, sent_at)), True)
+        finally:
+            self.q_output.close()
+
+    def blur_slot(self, slot):
+        """Desfoca um slot inteiro, em faixas no pool ou direto neste processo"""
+        engine = self.engine
+        if self.pool is None or self.workers == 1:
+            np.copyto(self.ring.outputs[slot], engine.blur_rows(self.ring.inputs[slot]))
+            return
+        futures = [self.pool.submit(_blur_stripe, self.ring.name, self.ring.slots, self.ring.shape,
+                                    slot, y0, y1, engine.radius, engine.gamma, engine.dim)
+                   for y0, y1 in self.stripes]
+        for f in futures:
+            f.result()
+
+    def _output_loop(self):
+        width, height = self.out_size
+        while True:
+            stamp, slot, sent_at = self.q_output.get()
+            t0 = time.perf_counter()
+            try:
+                frame = self.engine.upscale(self.ring.outputs[slot], width, height)
+                if np.may_share_memory(frame, self.ring.outputs):
+                    # Sem ampliação (proc = saída) o resize devolve o próprio slot, que
+                    # volta ao anel logo abaixo: o destino nunca recebe memória do anel
+                    frame = frame.copy()
+                self.sink.write(frame)
+            finally:
+                self.ring.release(slot)
+            now = time.perf_counter()
+            self.telemetry.record("video.output", now - t0)
+            self.telemetry.record("video.latency", now - stamp)
+            self.telemetry.count("video.frames")
+            with self.lock:
+                self.frames_out += 1
+                self.output_times.append(now)
+                if sent_at is not None:
+                    self.switch_latencies.append(now - sent_at)
+                self.finished_at = now
+
+    def wait(self, timeout=None):
+        """Espera a origem acabar e todos os estágios esvaziarem"""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        for t in self.threads:
+            t.join(None if deadline is None else max(0.0, deadline - time.perf_counter()))
+        return not any(t.is_alive() for t in self.threads)
+
+    def stop(self):
+        """Interrompe os estágios, descarta quadros pendentes e libera recursos"""
+        self.stop_event.set()
+        for q in (self.q_capture, self.q_blur, self.q_output):
+            q.close()
+        for t in self.threads:
+            t.join(timeout=2)
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+            self.pool = None
+        self.source.close()
+        self.sink.close()
+        self.ring.close()
+
+    def stats(self):
+        with self.lock:
+            end = self.finished_at or time.perf_counter()
+            elapsed = end - self.started_at if self.started_at else 0.0
+            stats = {
+                "workers": self.workers,
+                "proc_scale": self.engine.proc_scale,
+                "frames_in": self.frames_in,
+                "frames_out": self.frames_out,
+                "dropped": self.dropped,
+                "fps": self.frames_out / elapsed if elapsed > 0 else 0.0,
+            }
+        latency = self.telemetry.series.get("video.latency")
+        summary = latency.summary() if latency is not None else None
+        if summary:
+            stats["latency_p50_ms"] = summary["p50"] * 1000.0
+            stats["latency_p95_ms"] = summary["p95"] * 1000.0
+        return stats
+
+    def run(self, stop_event=None):
+        """Executa até a origem acabar (ou stop_event); devolve as estatísticas"""
+        try:
+            self.start()
+            while not self.wait(timeout=0.1):
+                if stop_event is not None and stop_event.is_set():
+                    break
+        finally:
+            self.stop()
+        if self.error is not None:
+            raise self.error
+        return self.stats()
+
+
+def measure_scaling(engine, worker_counts, width=1920, height=1080, frames=240, drop_late=False):
+    """Mede fps por número de workers com uma origem sintética sem limite de taxa"""
+    results = []
+    for workers in worker_counts:
+        cap_w, cap_h = engine.capture_size(width, height)
+        source = SyntheticSource(cap_w, cap_h, frames=frames)
+        pipeline = FramePipeline(engine, source, NullSink(), workers=workers,
+                                 drop_late=drop_late, out_size=(width, height))
+        results.append(pipeline.run())
+    return results
+
+
+def measure_param_switch(engine, workers=1, width=1280, height=720, fps=30.0, seconds=3.0):
+    """
+    Troca o raio do desfoque no meio de uma captura em tempo real e mede o
+    tempo do pedido até o primeiro quadro com o novo valor, além do maior
+    intervalo entre quadros de saída (não deve passar muito de 1000/fps).
+    """
+    cap_w, cap_h = engine.capture_size(width, height)
+    source = SyntheticSource(cap_w, cap_h, frames=int(seconds * fps), fps=fps, realtime=True)
+    pipeline = FramePipeline(engine, source, NullSink(), workers=workers, out_size=(width, height))
+    timer = threading.Timer(seconds / 2, pipeline.set_params, kwargs={"blur": engine.blur / 2, "dim": 0.1})
+    timer.start()
+    try:
+        stats = pipeline.run()
+    finally:
+        timer.cancel()
+    gaps = np.diff(pipeline.output_times) * 1000.0
+    stats["switch_latency_ms"] = pipeline.switch_latencies[0] * 1000.0 if pipeline.switch_latencies else None
+    stats["max_gap_ms"] = float(gaps.max()) if gaps.size else None
+    stats["frame_ms"] = 1000.0 / fps
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mede a escala do pipeline de desfoque por núcleo")
+    parser.add_argument("--width", type=int, default=1920)
+    parser.add_argument("--height", type=int, default=1080)
+    parser.add_argument("--frames", type=int, default=240)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--bench-switch", action="store_true", help="Mede a troca de parâmetros ao vivo")
+    opts, engine_args = parser.parse_known_args(argv)
+
+    engine = BlurEngine.from_args(engine_args)
+    if opts.bench_switch:
+        print(f"{'workers':>8} {'troca':>9} {'maior intervalo':>16} {'quadro':>9}")
+        for workers in opts.workers:
+            r = measure_param_switch(BlurEngine.from_args(engine_args), workers)
+            print(f"{workers:>8} {r['switch_latency_ms']:7.1f}ms {r['max_gap_ms']:14.1f}ms {r['frame_ms']:7.1f}ms")
+        return 0
+
+    print(f"{opts.width}x{opts.height}, {opts.frames} quadros, {os.cpu_count()} núcleos")
+    print(f"{'workers':>8} {'fps':>8} {'escala':>8} {'p50':>9} {'p95':>9}")
+    base = None
+    for r in measure_scaling(engine, opts.workers, opts.width, opts.height, opts.frames):
+        base = base or r["fps"]
+        print(f"{r['workers']:>8} {r['fps']:8.1f} {r['fps'] / base:7.2f}x "
+              f"{r['latency_p50_ms']:7.1f}ms {r['latency_p95_ms']:7.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
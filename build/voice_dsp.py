@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+Modificador de voz em streaming (Python/NumPy)
+Reproduz as cadeias do ffplay (highpass -> asetrate/aresample -> lowpass)
+processando blocos float32, sem subprocesso e com latência controlada.
+"""
+
+import argparse
+import re
+import sys
+import threading
+import time
+import wave
+
+import numpy as np
+
+from control_channel import ControlChannel
+from telemetry import Telemetry
+
+SAMPLE_RATE = 48000
+
+# Equivalentes das cadeias audio_filters_male/audio_filters_female do blur_voice.py
+PRESETS = {
+    "masculino": {"highpass": 60.0, "pitch": 0.700899, "lowpass": 7000.0},
+    "feminino": {"highpass": 60.0, "pitch": 1.3, "lowpass": 7000.0},
+}
+
+
+def preset_from_filters(filters):
+    """
+    Converte uma cadeia de filtros do ffplay no preset equivalente.
+    O atempo é ignorado: num fluxo ao vivo a duração não pode mudar, então
+    só o fator de asetrate (altura + formantes) é reproduzido.
+    """
+    preset = {"highpass": None, "pitch": 1.0, "lowpass": None}
+    for name, value in re.findall(r"(\w+)=([^,]+)", filters):
+        if name == "highpass":
+            preset["highpass"] = float(value.split("=")[-1])
+        elif name == "lowpass":
+            preset["lowpass"] = float(value.split("=")[-1])
+        elif name == "asetrate":
+            match = re.match(r"\s*(\d+)\s*\*\s*([\d.]+)", value)
+            if match:
+                preset["pitch"] = float(match.group(2))
+    return preset
+
+
+class Biquad:
+    """
+    Filtro biquad (RBJ cookbook) processado por bloco de forma vetorizada.
+    Para um bloco de N amostras, y = T @ x + S @ estado, onde T é a matriz
+    triangular da resposta ao impulso e S propaga o estado anterior; as
+    matrizes são calculadas uma vez por tamanho de bloco.
+    """
+
+    def __init__(self, kind, freq, sample_rate=SAMPLE_RATE, q=0.7071):
+        w0 = 2.0 * np.pi * freq / sample_rate
+        alpha = np.sin(w0) / (2.0 * q)
+        cos_w0 = np.cos(w0)
+        if kind == "lowpass":
+            b = [(1 - cos_w0) / 2, 1 - cos_w0, (1 - cos_w0) / 2]
+        elif kind == "highpass":
+            b = [(1 + cos_w0) / 2, -(1 + cos_w0), (1 + cos_w0) / 2]
+        else:
+            raise ValueError(f"Tipo de filtro desconhecido: {kind}")
+        a0 = 1 + alpha
+        self.b = np.array(b) / a0
+        self.a = np.array([1.0, -2 * cos_w0 / a0, (1 - alpha) / a0])
+        # Estado: x[-1], x[-2], y[-1], y[-2]
+        self.state = np.zeros(4)
+        self._matrices = {}
+
+    def _run(self, x, state):
+        """Recursão escalar de referência (usada só para montar as matrizes)"""
+        b0, b1, b2 = self.b
+        _, a1, a2 = self.a
+        x1, x2, y1, y2 = state
+        y = np.empty(len(x))
+        for n, xn in enumerate(x):
+            yn = b0 * xn + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+            x2, x1, y2, y1 = x1, xn, y1, yn
+            y[n] = yn
+        return y
+
+    def matrices(self, n):
+        m = self._matrices.get(n)
+        if m is None:
+            impulse = np.zeros(n)
+            impulse[0] = 1.0
+            h = self._run(impulse, (0.0, 0.0, 0.0, 0.0))
+            idx = np.arange(n)
+            lag = idx[:, None] - idx[None, :]
+            t = np.where(lag >= 0, h[np.clip(lag, 0, n - 1)], 0.0)
+            s = np.stack([self._run(np.zeros(n), unit) for unit in np.eye(4)], axis=1)
+            m = self._matrices[n] = (t, s)
+        return m
+
+    def process(self, x):
+        n = len(x)
+        t, s = self.matrices(n)
+        y = t @ x + s @ self.state
+        if n >= 2:
+            self.state = np.array([x[-1], x[-2], y[-1], y[-2]])
+        else:
+            self.state = np.array([x[-1], self.state[0], y[-1], self.state[2]])
+        return y.astype(np.float32)
+
+    def reset(self):
+        self.state[:] = 0.0
+
+
+class PitchShifter:
+    """
+    Deslocador de altura por linha de atraso com duas leituras em
+    contrafase (janela Hann, soma unitária). Como o asetrate do ffplay,
+    altura e formantes são deslocados juntos pelo mesmo fator.
+
+    A linha de atraso é um buffer circular pré-alocado; a latência
+    algorítmica média é window/2 (máxima = window).
+    """
+
+    def __init__(self, ratio, sample_rate=SAMPLE_RATE, window_ms=20.0, max_block=4096):
+        self.ratio = float(ratio)
+        self.window = max(8, int(sample_rate * window_ms / 1000.0))
+        size = 1
+        while size < self.window + max_block + 2:
+            size *= 2
+        self.buffer = np.zeros(size, dtype=np.float32)
+        self.mask = size - 1
+        self.max_block = max_block
+        self.write_pos = 0
+        self.phase = 0.0
+        self._ramp = np.arange(max_block, dtype=np.float64)
+
+    @property
+    def latency_samples(self):
+        return self.window / 2.0
+
+    def process(self, x):
+        n = len(x)
+        if n > self.max_block:
+            return np.concatenate([self.process(x[i:i + self.max_block])
+                                   for i in range(0, n, self.max_block)])
+        start = self.write_pos
+        idx = (start + np.arange(n)) & self.mask
+        self.buffer[idx] = x
+        self.write_pos = start + n
+
+        if self.ratio == 1.0:
+            return np.asarray(x, dtype=np.float32).copy()
+
+        step = (1.0 - self.ratio) / self.window
+        ramp = self._ramp[:n]
+        out = np.zeros(n, dtype=np.float64)
+        for offset in (0.0, 0.5):
+            phase = (self.phase + offset + ramp * step) % 1.0
+            pos = start + ramp - phase * self.window
+            i0 = np.floor(pos)
+            frac = pos - i0
+            i0 = i0.astype(np.int64)
+            a = self.buffer[i0 & self.mask]
+            b = self.buffer[(i0 + 1) & self.mask]
+            out += np.sin(np.pi * phase) ** 2 * (a + (b - a) * frac)
+        self.phase = (self.phase + n * step) % 1.0
+        return out.astype(np.float32)
+
+    def reset(self):
+        self.buffer[:] = 0.0
+        self.write_pos = 0
+        self.phase = 0.0
+
+
+class VoiceChanger:
+    """Cadeia highpass -> pitch -> lowpass equivalente a um preset do ffplay (mono)"""
+
+    def __init__(self, preset, sample_rate=SAMPLE_RATE, window_ms=20.0):
+        if isinstance(preset, str):
+            preset = PRESETS[preset] if preset in PRESETS else preset_from_filters(preset)
+        self.preset = dict(preset)
+        self.sample_rate = sample_rate
+        self.stages = []
+        if self.preset.get("highpass"):
+            self.stages.append(Biquad("highpass", self.preset["highpass"], sample_rate))
+        self.shifter = PitchShifter(self.preset.get("pitch", 1.0), sample_rate, window_ms)
+        self.stages.append(self.shifter)
+        if self.preset.get("lowpass"):
+            self.stages.append(Biquad("lowpass", self.preset["lowpass"], sample_rate))
+
+    def prepare(self, block_size):
+        """Pré-calcula as matrizes dos biquads para o tamanho de bloco usado no stream"""
+        for stage in self.stages:
+            if isinstance(stage, Biquad):
+                stage.matrices(block_size)
+
+    def latency_ms(self, block_size):
+        """Latência algorítmica: bufferização de um bloco + atraso médio do deslocador"""
+        return (block_size + self.shifter.latency_samples) * 1000.0 / self.sample_rate
+
+    def process(self, block):
+        """Processa um bloco (N,) ou (N, canais); devolve float32 mono (N,)"""
+        x = np.asarray(block, dtype=np.float32)
+        if x.ndim == 2:
+            x = x.mean(axis=1)
+        for stage in self.stages:
+            x = stage.process(x)
+        return x
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+
+class LiveVoiceChanger:
+    """
+    VoiceChanger com troca de preset ao vivo. set_preset() monta a nova
+    cadeia e a aquece com uma cópia do histórico recente de entrada (linha de
+    atraso e estados dos filtros já cheios), tudo fora do thread de áudio, e
+    a entrega pelo ControlChannel. No thread de áudio só os blocos chegados
+    depois da cópia são repassados a ela (normalmente nenhum ou um) antes do
+    crossfade de potência constante, sem silêncio entre os presets. O
+    histórico tem um número inteiro de blocos, então o aquecimento só usa as
+    matrizes já preparadas para block_size. Um preset pedido durante um
+    crossfade só entra depois que ele termina.
+    """
+
+    def __init__(self, preset, sample_rate=SAMPLE_RATE, window_ms=20.0, block_size=256,
+                 crossfade_ms=10.0, warmup_ms=40.0):
+        self.sample_rate = sample_rate
+        self.window_ms = window_ms
+        self.block_size = block_size
+        self.chain = VoiceChanger(preset, sample_rate, window_ms)
+        self.chain.prepare(block_size)
+        self.channel = ControlChannel()
+        self.crossfade = max(1, int(sample_rate * crossfade_ms / 1000.0))
+        blocks = max(1, -(-int(sample_rate * warmup_ms / 1000.0) // block_size))
+        self.history = np.zeros(blocks * block_size, dtype=np.float32)
+        # Amostras recebidas; set_preset() guarda quantas já estavam no histórico copiado
+        self.samples_in = 0
+        self.history_lock = threading.Lock()
+        self.incoming = None
+        self.fade_pos = 0
+        self.switches = 0
+
+    @property
+    def preset(self):
+        return self.chain.preset
+
+    def latency_ms(self, block_size=None):
+        return self.chain.latency_ms(block_size or self.block_size)
+
+    def set_preset(self, preset):
+        """Agenda a troca de preset (chamado por outro thread)"""
+        chain = VoiceChanger(preset, self.sample_rate, self.window_ms)
+        chain.prepare(self.block_size)
+        with self.history_lock:
+            history = self.history.copy()
+            stamp = self.samples_in
+        self._warm(chain, history)
+        self.channel.send(chain=chain, stamp=stamp)
+
+    def _warm(self, chain, samples):
+        for i in range(0, len(samples), self.block_size):
+            chain.process(samples[i:i + self.block_size])
+
+    def process(self, block):
+        x = np.asarray(block, dtype=np.float32)
+        if x.ndim == 2:
+            x = x.mean(axis=1)
+        # Durante um crossfade o próximo preset espera no canal (o mais recente
+        # vence): trocar a cadeia que está entrando no meio do fade seria um clique
+        update = self.channel.poll() if self.incoming is None else None
+        if update is not None:
+            self.incoming = update["chain"]
+            self.fade_pos = 0
+            # Alcança a entrada recebida enquanto set_preset() aquecia a cadeia
+            behind = self.samples_in - update["stamp"]
+            if behind > 0:
+                self._warm(self.incoming, self.history[-min(behind, len(self.history)):])
+
+        n = len(x)
+        with self.history_lock:
+            if n >= len(self.history):
+                self.history[:] = x[-len(self.history):]
+            else:
+                self.history[:-n] = self.history[n:]
+                self.history[-n:] = x
+            self.samples_in += n
+
+        y = self.chain.process(x)
+        if self.incoming is None:
+            return y
+        y_new = self.incoming.process(x)
+        t = np.clip((self.fade_pos + np.arange(n) + 1) / self.crossfade, 0.0, 1.0)
+        self.fade_pos += n
+        y = y * np.cos(0.5 * np.pi * t) + y_new * np.sin(0.5 * np.pi * t)
+        if self.fade_pos >= self.crossfade:
+            self.chain = self.incoming
+            self.incoming = None
+            self.switches += 1
+        return y.astype(np.float32)
+
+    def reset(self):
+        self.chain.reset()
+        self.incoming = None
+        with self.history_lock:
+            self.history[:] = 0.0
+
+
+class ArrayInput:
+    """Entrega um array em blocos de block_size amostras"""
+
+    def __init__(self, samples, block_size=256, sample_rate=SAMPLE_RATE):
+        self.samples = np.asarray(samples, dtype=np.float32)
+        self.block_size = block_size
+        self.sample_rate = sample_rate
+        self.pos = 0
+
+    def read(self):
+        if self.pos >= len(self.samples):
+            return None
+        block = self.samples[self.pos:self.pos + self.block_size]
+        self.pos += self.block_size
+        return block
+
+    def close(self):
+        pass
+
+
+class ArrayOutput:
+    """Acumula os blocos processados"""
+
+    def __init__(self):
+        self.blocks = []
+
+    def write(self, block):
+        self.blocks.append(block)
+
+    @property
+    def samples(self):
+        return np.concatenate(self.blocks) if self.blocks else np.zeros(0, dtype=np.float32)
+
+    def close(self):
+        pass
+
+
+class WavInput(ArrayInput):
+    """Lê um WAV PCM 16 bits (mono ou estéreo) em blocos"""
+
+    def __init__(self, path, block_size=256):
+        with wave.open(str(path), "rb") as f:
+            if f.getsampwidth() != 2:
+                raise ValueError("Apenas WAV PCM 16 bits é suportado")
+            channels = f.getnchannels()
+            sample_rate = f.getframerate()
+            data = np.frombuffer(f.readframes(f.getnframes()), dtype="<i2")
+        samples = data.reshape(-1, channels).astype(np.float32) / 32768.0
+        super().__init__(samples, block_size, sample_rate)
+
+
+class WavOutput:
+    """Grava os blocos processados como WAV PCM 16 bits mono"""
+
+    def __init__(self, path, sample_rate=SAMPLE_RATE):
+        self.file = wave.open(str(path), "wb")
+        self.file.setnchannels(1)
+        self.file.setsampwidth(2)
+        self.file.setframerate(sample_rate)
+
+    def write(self, block):
+        pcm = np.clip(block * 32768.0, -32768, 32767).astype("<i2")
+        self.file.writeframes(pcm.tobytes())
+
+    def close(self):
+        self.file.close()
+
+
+class SoundDeviceStream:
+    """Entrada de microfone -> VoiceChanger -> saída padrão via sounddevice (dependência opcional)"""
+
+    def __init__(self, changer, input_device=None, block_size=256, telemetry=None, output_device=None):
+        try:
+            import sounddevice
+        except ImportError:
+            raise RuntimeError("sounddevice não instalado (pip install sounddevice)")
+        self.changer = changer
+        self.telemetry = telemetry if telemetry is not None else Telemetry()
+        extra = None
+        if input_device is not None:
+            hostapi = sounddevice.query_devices(input_device)["hostapi"]
+            if sounddevice.query_hostapis(hostapi)["name"] == "Windows WASAPI":
+                # No modo compartilhado o WASAPI só abre na taxa do mixer sem a conversão
+                extra = sounddevice.WasapiSettings(auto_convert=True)
+        self.stream = sounddevice.Stream(samplerate=changer.sample_rate, blocksize=block_size,
+                                         device=(input_device, output_device), channels=(1, 1),
+                                         dtype="float32", latency="low", callback=self._callback,
+                                         extra_settings=(extra, extra))
+
+    def _callback(self, indata, outdata, frames, time_info, status):
+        t0 = time.perf_counter()
+        outdata[:, 0] = self.changer.process(indata[:, 0])
+        telemetry = self.telemetry
+        telemetry.record("audio.dsp", time.perf_counter() - t0)
+        # Latências de entrada (ADC -> callback) e saída (callback -> DAC) informadas pelo PortAudio
+        telemetry.record("audio.input", time_info.currentTime - time_info.inputBufferAdcTime)
+        telemetry.record("audio.output", time_info.outputBufferDacTime - time_info.currentTime)
+        telemetry.count("audio.blocks")
+        if status.input_overflow:
+            telemetry.count("audio.overruns")
+        if status.output_underflow:
+            telemetry.count("audio.underruns")
+
+    def start(self):
+        self.stream.start()
+
+    def close(self):
+        self.stream.stop()
+        self.stream.close()
+
+
+def process_stream(changer, source, sink):
+    """Processa a origem inteira, bloco a bloco; devolve o tempo de CPU gasto no DSP"""
+    busy = 0.0
+    try:
+        while True:
+            block = source.read()
+            if block is None:
+                break
+            t0 = time.perf_counter()
+            out = changer.process(block)
+            busy += time.perf_counter() - t0
+            sink.write(out)
+    finally:
+        source.close()
+        sink.close()
+    return busy
+
+
+def synthetic_voice(seconds=5.0, sample_rate=SAMPLE_RATE):
+    """Sinal de teste tipo voz: harmônicos de 140 Hz com vibrato e ruído leve"""
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    f0 = 140.0 * (1 + 0.03 * np.sin(2 * np.pi * 5 * t))
+    phase = 2 * np.pi * np.cumsum(f0) / sample_rate
+    signal = sum(np.sin(k * phase) / k for k in range(1, 12))
+    signal += 0.01 * np.random.default_rng(0).standard_normal(len(t))
+    return (0.3 * signal / np.abs(signal).max()).astype(np.float32)
+
+
+def benchmark(preset="masculino", block_sizes=(64, 128, 256, 512, 1024), seconds=10.0):
+    """Fator de tempo real (tempo de DSP / duração do áudio) e latência por tamanho de bloco"""
+    signal = synthetic_voice(seconds)
+    results = []
+    for block_size in block_sizes:
+        changer = VoiceChanger(preset)
+        busy = process_stream(changer, ArrayInput(signal, block_size), ArrayOutput())
+        results.append({
+            "block_size": block_size,
+            "rtf": busy / seconds,
+            "block_ms": block_size * 1000.0 / changer.sample_rate,
+            "latency_ms": changer.latency_ms(block_size),
+        })
+    return results
+
+
+def measure_switch(block_size=256, seconds=2.0, switch_at=1.0):
+    """
+    Troca masculino -> feminino no meio de um sinal e mede: tempo entre o
+    pedido e o fim do crossfade, o maior trecho de silêncio na saída e o
+    menor RMS por bloco ao redor da troca relativo ao menor RMS fora dela
+    (>= ~1 = a troca não cria buraco no áudio).
+    """
+    signal = synthetic_voice(seconds)
+    changer = LiveVoiceChanger("masculino", block_size=block_size)
+    source = ArrayInput(signal, block_size)
+    out = []
+    requested = done = None
+    pos = 0
+    while True:
+        block = source.read()
+        if block is None:
+            break
+        if requested is None and pos >= switch_at * SAMPLE_RATE:
+            requested = pos
+            changer.set_preset("feminino")
+        y = changer.process(block)
+        pos += len(block)
+        if requested is not None and done is None and changer.switches:
+            done = pos
+        out.append(y)
+
+    rms = np.array([np.sqrt(np.mean(b.astype(np.float64) ** 2)) for b in out])
+    settle = len(rms) // 10
+    first = requested // block_size
+    last = done // block_size + 1
+    steady = np.concatenate([rms[settle:first], rms[last:]])
+
+    # Maior sequência de amostras (praticamente) nulas após o início
+    silent = np.abs(np.concatenate(out)[settle * block_size:]) < 1e-4
+    edges = np.diff(np.concatenate([[0], silent.astype(np.int8), [0]]))
+    runs = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    return {
+        "block_size": block_size,
+        "switch_latency_ms": (done - requested) * 1000.0 / SAMPLE_RATE,
+        "silence_ms": (runs.max() if runs.size else 0) * 1000.0 / SAMPLE_RATE,
+        "min_rms_ratio": float(rms[first:last].min() / steady.min()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Modificador de voz em streaming")
+    parser.add_argument("--preset", default="masculino", choices=sorted(PRESETS))
+    parser.add_argument("--input", help="WAV PCM 16 bits de entrada")
+    parser.add_argument("--output", help="WAV de saída")
+    parser.add_argument("--block-size", type=int, default=256)
+    parser.add_argument("--bench", action="store_true", help="Mede o fator de tempo real por tamanho de bloco")
+    parser.add_argument("--bench-switch", action="store_true", help="Mede a troca de preset ao vivo")
+    opts = parser.parse_args(argv)
+
+    if opts.bench:
+        print(f"{'bloco':>6} {'duração':>9} {'latência':>9} {'RTF':>8}")
+        for r in benchmark(opts.preset):
+            print(f"{r['block_size']:>6} {r['block_ms']:7.2f}ms {r['latency_ms']:7.2f}ms {r['rtf']:8.4f}")
+        return 0
+
+    if opts.bench_switch:
+        print(f"{'bloco':>6} {'troca':>9} {'silêncio':>9} {'RMS mín.':>9}")
+        for block_size in (64, 128, 256, 512, 1024):
+            r = measure_switch(block_size)
+            print(f"{r['block_size']:>6} {r['switch_latency_ms']:7.2f}ms {r['silence_ms']:7.2f}ms "
+                  f"{r['min_rms_ratio']:9.2f}")
+        return 0
+
+    if not opts.input or not opts.output:
+        parser.error("--input e --output são obrigatórios fora do modo --bench")
+    source = WavInput(opts.input, opts.block_size)
+    changer = VoiceChanger(opts.preset, sample_rate=source.sample_rate)
+    busy = process_stream(changer, source, WavOutput(opts.output, source.sample_rate))
+    duration = len(source.samples) / source.sample_rate
+    print(f"{duration:.1f}s de áudio em {busy:.3f}s (RTF {busy / duration:.4f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,6 +2,7 @@
 """
 Ponto de entrada principal do Anonimizador
 """
+import multiprocessing
 import sys
 from pathlib import Path
 
@@ -12,5 +13,7 @@ if not getattr(sys, 'frozen', False):
 from blur_voice import ModernBlurCam
 
 if __name__ == "__main__":
+    # Necessário para o pool de processos do desfoque no executável PyInstaller
+    multiprocessing.freeze_support()
     app = ModernBlurCam()
     app.root.mainloop()
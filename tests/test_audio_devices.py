@@ -0,0 +1,75 @@
+"""
+Parser da saída de "ffplay -list_devices true -f dshow" sobre as saídas
+gravadas em assets/fixtures/ (formato antigo, com seções, e o do FFmpeg 5+,
+com o tipo entre parênteses).
+"""
+
+import os
+import sys
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "build"))
+
+from audio_devices import diff_devices, parse_dshow_devices  # noqa: E402
+
+FIXTURES = os.path.join(ROOT, "assets", "fixtures")
+
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+class ParseDshowDevicesTest(unittest.TestCase):
+
+    def test_ffmpeg4_sections(self):
+        output = fixture("list_devices_ffmpeg4.txt")
+        self.assertEqual(parse_dshow_devices(output), [
+            "Microfone (2- Fifine Microphone)",
+            "Microfone (Realtek(R) Audio)",
+            "CABLE Output (VB-Audio Virtual Cable)",
+        ])
+        self.assertEqual(parse_dshow_devices(output, "video"), [
+            "Integrated Webcam",
+            "Unity Video Capture",
+        ])
+
+    def test_ffmpeg6_type_tags(self):
+        output = fixture("list_devices_ffmpeg6.txt")
+        self.assertEqual(parse_dshow_devices(output), [
+            "Microfone (2- Fifine Microphone)",
+            "Microfone (Realtek(R) Audio)",
+            "CABLE Output (VB-Audio Virtual Cable)",
+            "Headset Microphone (Jabra EVOLVE 20 MS)",
+        ])
+        # "(none)" não é áudio nem vídeo
+        self.assertEqual(parse_dshow_devices(output, "video"), [
+            "Integrated Webcam",
+            "Unity Video Capture",
+        ])
+
+    def test_skips_alternative_names(self):
+        for name in ("list_devices_ffmpeg4.txt", "list_devices_ffmpeg6.txt"):
+            with self.subTest(fixture=name):
+                output = fixture(name)
+                devices = parse_dshow_devices(output) + parse_dshow_devices(output, "video")
+                self.assertFalse([d for d in devices if d.startswith("@device")])
+
+    def test_duplicates_keep_first_position(self):
+        line = '[in#0 @ 0] "Mic" (audio)\n'
+        output = line + '[in#0 @ 0] "Outro" (audio)\n' + line
+        self.assertEqual(parse_dshow_devices(output), ["Mic", "Outro"])
+
+    def test_empty_output(self):
+        self.assertEqual(parse_dshow_devices(""), [])
+
+
+class DiffDevicesTest(unittest.TestCase):
+
+    def test_added_and_removed(self):
+        self.assertEqual(diff_devices(["a", "b"], ["b", "c"]), (["c"], ["a"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+"""
+Travamento do thread da interface ao iniciar/parar filhos pelo ProcessSupervisor
+Filhos substitutos como os do benchmark (process_supervisor.py --bench): um
+verboso, que enche o pipe se ninguém drenar, e um que ignora SIGTERM.
+"""
+
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "build"))
+
+from process_supervisor import ProcessSupervisor  # noqa: E402
+
+# Maior intervalo aceitável entre dois ticks do "mainloop"
+MAX_STALL_MS = 100.0
+
+CHATTY = "import sys\nwhile True: sys.stdout.write('x' * 1000 + '\\n')"
+STUBBORN = ("import signal, time\nsignal.signal(signal.SIGTERM, signal.SIG_IGN)\n"
+            "while True: print('tick', flush=True); time.sleep(0.05)")
+
+
+def ui_probe(duration, actions):
+    """Simula o mainloop: ticks de 1 ms executando actions[i] em t_i; devolve o maior intervalo (ms)"""
+    start = last = time.perf_counter()
+    worst = 0.0
+    pending = sorted(actions, key=lambda a: a[0])
+    while time.perf_counter() - start < duration:
+        now = time.perf_counter()
+        while pending and now - start >= pending[0][0]:
+            pending.pop(0)[1]()
+        now = time.perf_counter()
+        worst = max(worst, now - last)
+        last = now
+        time.sleep(0.001)
+    return worst * 1000.0
+
+
+class UiStallTest(unittest.TestCase):
+
+    def setUp(self):
+        self.supervisor = ProcessSupervisor()
+        self.addCleanup(self.supervisor.close)
+
+    def test_start_stop_does_not_stall_ui(self):
+        cmds = [[sys.executable, "-c", CHATTY], [sys.executable, "-c", STUBBORN]]
+        procs = []
+        stops = []
+
+        def start():
+            for i, cmd in enumerate(cmds):
+                self.supervisor.spawn(f"child{i}", cmd)
+
+        def collect():
+            procs.extend(c.proc for c in list(self.supervisor.children.values()))
+
+        worst_ms = ui_probe(2.5, [
+            (0.1, start),
+            (1.0, collect),
+            (1.2, lambda: stops.append(self.supervisor.stop_all(timeout=1.0))),
+        ])
+
+        self.assertLess(worst_ms, MAX_STALL_MS)
+        self.assertEqual(len(procs), 2, "os dois filhos deveriam estar rodando antes do stop_all")
+
+        stops[0].result(timeout=5)
+        # stop_all() só conclui com os filhos colhidos, inclusive o que ignora SIGTERM
+        self.assertEqual(self.supervisor.children, {})
+        self.assertEqual(self.supervisor.pids(), {})
+        for proc in procs:
+            self.assertIsNotNone(proc.returncode, f"PID {proc.pid} ainda em execução")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Controle adaptativo de qualidade contra o modelo de carga simulado
+(quality_controller.py --simulate): convergência em cada perfil, histerese
+(sem oscilar entre pontos) e partida do ponto salvo.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "build"))
+
+from quality_controller import (MAX_PROC_SCALE, PROFILES, QualityController,  # noqa: E402
+                                SimulatedMachine, simulate, summarize)
+
+WINDOWS = 120
+# Janela até a qual o ponto de operação precisa ter se estabilizado
+SETTLE_BY = 40
+
+
+def make_controller(profile, saved=None):
+    max_workers = max(1, min(8, profile["cores"] - 1))
+    return QualityController.from_config(saved, max_workers=max_workers, proc_scale=0.4,
+                                         workers=1, max_scale=MAX_PROC_SCALE)
+
+
+def visited(trace):
+    """Sequência de pontos (proc_scale, workers) pelos quais o controlador passou"""
+    points = [(r["proc_scale"], r["workers"]) for r in trace]
+    return [p for i, p in enumerate(points) if i == 0 or p != points[i - 1]]
+
+
+class SimulationTest(unittest.TestCase):
+
+    def run_profile(self, name, saved=None, events=None):
+        profile = PROFILES[name]
+        controller = make_controller(profile, saved)
+        trace = simulate(controller, SimulatedMachine(**profile), WINDOWS, events)
+        return controller, trace
+
+    def test_converges(self):
+        for name in PROFILES:
+            with self.subTest(profile=name):
+                controller, trace = self.run_profile(name)
+                summary = summarize(trace, controller)
+                self.assertLessEqual(summary["settled_at"], SETTLE_BY)
+                self.assertGreaterEqual(summary["fps"], 0.92 * controller.target_fps)
+                self.assertLess(summary["latency_ms"], controller.latency_budget_ms)
+
+    def test_no_oscillation(self):
+        for name in PROFILES:
+            with self.subTest(profile=name):
+                # A carga externa muda no meio: o controlador se reajusta, mas sem ir e voltar
+                _, trace = self.run_profile(name, events={WINDOWS // 2: 0.5})
+                points = visited(trace)
+                for i in range(len(points) - 2):
+                    self.assertNotEqual(points[i], points[i + 2],
+                                        f"oscilou entre {points[i]} e {points[i + 1]}")
+                self.assertLessEqual(len(points) - 1, 6)
+
+    def test_adds_worker_to_raise_resolution(self):
+        # Em "media", 0.5 não cabe com um worker; com dois cabe
+        controller, _ = self.run_profile("media")
+        self.assertGreater(controller.point["proc_scale"], 0.4)
+        self.assertGreater(controller.point["workers"], 1)
+
+    def test_starts_from_saved_point(self):
+        for name in PROFILES:
+            with self.subTest(profile=name):
+                first, _ = self.run_profile(name)
+                saved = first.to_config()
+                controller, trace = self.run_profile(name, saved=saved)
+                self.assertEqual(visited(trace[:1]), [(saved["proc_scale"], saved["workers"])])
+                self.assertEqual(summarize(trace, controller)["changes"], 0)
+                self.assertEqual(controller.point, saved)
+
+
+if __name__ == "__main__":
+    unittest.main()